@@ -0,0 +1,331 @@
+import re
+import json
+import time
+import asyncio
+import discord
+from collections import OrderedDict, deque
+from discord.ext import commands
+
+# Storage file for anti-spam settings
+ANTISPAM_FILE = "src/antispam.json"
+
+DEFAULT_CONFIG = {
+    "enabled": False,
+    "flood": [6, 5.0],  # messages per user within seconds
+    "duplicates": [3, 30.0],  # identical messages per user within seconds
+    "channel": [20, 5.0],  # messages per channel within seconds before slowmode
+    "copies": [3, 30.0],  # users posting the same text in one channel within seconds
+    "mentions": 6,  # mentions in one message
+    "emojis": 12,  # emojis in one message
+    "punishment": "timeout",
+    "duration": "10m",
+    "others": "delete",  # what happens to the earlier posters in a copy-paste raid: delete or punish
+    "slowmode": 5
+}
+LIMITS = ("flood", "duplicates", "channel", "copies", "mentions", "emojis")
+
+USER_HISTORY = 8  # recent content hashes kept per user
+CHANNEL_HISTORY = 16  # recent (hash, author) pairs kept per channel
+IDLE_TTL = 300  # seconds before an inactive user or channel is forgotten
+MAX_TRACKED = 200000
+SLOWMODE_RESET = 300
+COPY_MIN_LENGTH = 12  # shorter text only counts as a copy if it has a link or mention
+
+LINK_REGEX = re.compile(r"https?://|discord(?:app)?\.(?:gg|com/invite)/", re.IGNORECASE)
+EMOJI_REGEX = re.compile(r"<a?:\w+:\d+>|[\U0001F1E6-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]")
+
+
+class RingState:
+    """Recent message timestamps and content hashes for one user or channel"""
+
+    __slots__ = ("times", "recent", "last_seen")
+
+    def __init__(self, times: int, recent: int):
+        self.times = deque(maxlen=times)
+        self.recent = deque(maxlen=recent)
+        self.last_seen = 0.0
+
+
+class RingTracker:
+    """RingStates by key, least recently active first, so idle keys expire from the front in O(1)"""
+
+    def __init__(self, idle: float, max_keys: int):
+        self.idle = idle
+        self.max_keys = max_keys
+        self.states = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def get(self, key, now: float, times: int, recent: int) -> RingState:
+        state = self.states.get(key)
+        if state is None or state.times.maxlen != times or state.recent.maxlen != recent:
+            state = self.states[key] = RingState(times, recent)
+        self.states.move_to_end(key)
+        state.last_seen = now
+
+        while self.states:
+            oldest = next(iter(self.states.values()))
+            if now - oldest.last_seen < self.idle and len(self.states) <= self.max_keys:
+                break
+            self.states.popitem(last=False)
+        return state
+
+
+def within(state: RingState, now: float, per: float) -> bool:
+    """Whether the timestamp ring is full and its oldest entry is still inside the window"""
+    return len(state.times) == state.times.maxlen and now - state.times[0] <= per
+
+
+class AntiSpam(commands.Cog):
+    """Flood, duplicate, mention and emoji spam detection"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.config: dict = {}
+        self.loaded = asyncio.Event()
+        self.users = RingTracker(IDLE_TTL, MAX_TRACKED)  # (guild_id, user_id) -> RingState
+        self.channels = RingTracker(IDLE_TTL, MAX_TRACKED)  # channel_id -> RingState
+        self.slowed: set = set()  # channel ids with slowmode we turned on
+        bot.loop.create_task(self._load_config())
+
+    async def _load_config(self):
+        loop = asyncio.get_event_loop()
+
+        def _read():
+            try:
+                with open(ANTISPAM_FILE, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return {}
+            except Exception:
+                return {}
+
+        data = await loop.run_in_executor(None, _read)
+        self.config = {int(guild_id): {**DEFAULT_CONFIG, **cfg} for guild_id, cfg in data.items()}
+        self.loaded.set()
+
+    async def _save_config(self):
+        # Never overwrite the file with a half-loaded cache
+        await self.loaded.wait()
+        loop = asyncio.get_event_loop()
+
+        def _write(payload):
+            with open(ANTISPAM_FILE, "w", encoding="utf-8") as f:
+                f.write(payload)
+
+        payload = json.dumps({str(k): v for k, v in self.config.items()}, indent=4)
+        await loop.run_in_executor(None, _write, payload)
+
+    async def cog_before_invoke(self, ctx):
+        # _load_config replaces the whole cache, so an edit made before it finishes would be lost
+        await self.loaded.wait()
+
+    def get_config(self, guild_id: int) -> dict:
+        cfg = self.config.get(guild_id)
+        if cfg is None:
+            cfg = self.config[guild_id] = dict(DEFAULT_CONFIG)
+        return cfg
+
+    def check(self, message: discord.Message, cfg: dict, now: float):
+        """Return (reason, other offenders, channel flooded) for a message; reason is None if it's fine
+
+        Other offenders are (user_id, message_id) pairs for the earlier copies of a copy-paste raid.
+        """
+        content = " ".join(message.content.lower().split())
+        digest = hash(content) if content else None
+        guild_id = message.guild.id
+
+        flood_count, flood_per = cfg["flood"]
+        dup_count, dup_per = cfg["duplicates"]
+        user = self.users.get((guild_id, message.author.id), now, flood_count, max(USER_HISTORY, dup_count))
+        user.times.append(now)
+
+        reason = None
+        if within(user, now, flood_per):
+            reason = "message flood"
+
+        if digest is not None:
+            same = 1 + sum(1 for ts, h in user.recent if h == digest and now - ts <= dup_per)
+            user.recent.append((now, digest))
+            if not reason and same >= dup_count:
+                reason = "duplicate messages"
+
+        if not reason:
+            mentions = len(set(message.raw_mentions)) + len(message.raw_role_mentions) + message.mention_everyone
+            if mentions >= cfg["mentions"]:
+                reason = "mass mentions"
+            elif len(EMOJI_REGEX.findall(message.content)) >= cfg["emojis"]:
+                reason = "emoji spam"
+
+        # Per channel: overall rate, and the same text arriving from several accounts
+        channel_count, _ = cfg["channel"]
+        copy_count, copy_per = cfg["copies"]
+        channel = self.channels.get(message.channel.id, now, channel_count, max(CHANNEL_HISTORY, copy_count))
+        channel.times.append(now)
+
+        others = []
+        # Short replies like "gg" or "lol" are posted by many people at once without being a raid
+        if digest is not None and (
+            len(content) >= COPY_MIN_LENGTH
+            or message.raw_mentions or message.raw_role_mentions or message.mention_everyone
+            or LINK_REGEX.search(content)
+        ):
+            others = [
+                (author, message_id) for ts, h, author, message_id in channel.recent
+                if h == digest and now - ts <= copy_per and author != message.author.id
+            ]
+            channel.recent.append((now, digest, message.author.id, message.id))
+            if len({author for author, _ in others}) + 1 >= copy_count:
+                reason = reason or "copy-paste raid"
+            else:
+                others = []
+        return reason, others, within(channel, now, cfg["channel"][1])
+
+    async def slow_down(self, channel: discord.TextChannel, seconds: int):
+        if channel.id in self.slowed or channel.slowmode_delay:
+            return
+        self.slowed.add(channel.id)
+        try:
+            await channel.edit(slowmode_delay=seconds, reason="Anti-spam: channel flood")
+            await asyncio.sleep(SLOWMODE_RESET)
+            await channel.edit(slowmode_delay=0, reason="Anti-spam: flood ended")
+        except discord.HTTPException as e:
+            print(f"[AntiSpam] Error setting slowmode in {channel.id}: {e}")
+        finally:
+            self.slowed.discard(channel.id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or not message.guild:
+            return
+        cfg = self.config.get(message.guild.id)
+        if not cfg or not cfg["enabled"]:
+            return
+        if not isinstance(message.author, discord.Member) or message.channel.permissions_for(message.author).manage_messages:
+            return
+
+        now = time.monotonic()
+        reason, others, flooded = self.check(message, cfg, now)
+
+        if flooded and isinstance(message.channel, discord.TextChannel):
+            self.bot.loop.create_task(self.slow_down(message.channel, cfg["slowmode"]))
+
+        if not reason:
+            return
+
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+        if others:
+            # Earlier copies are removed; their authors are only punished when the guild opted in
+            try:
+                await message.channel.delete_messages([discord.Object(id=message_id) for _, message_id in others])
+            except discord.HTTPException as e:
+                print(f"[AntiSpam] Error deleting copies in {message.channel.id}: {e}")
+
+        filter_cog = self.bot.get_cog("Filter")
+        if not filter_cog:
+            return
+        action = {"punishment": cfg["punishment"], "reason": f"Anti-spam: {reason}", "duration": cfg["duration"]}
+        filter_cog.punish(message.guild, message.author, action, reason)
+        if cfg["others"] != "punish":
+            return
+        for user_id in {author for author, _ in others}:
+            member = message.guild.get_member(user_id)
+            if member and not member.bot:
+                filter_cog.punish(message.guild, member, action, reason)
+
+    @commands.group(name="antispam", aliases=["spam"], invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def antispam(self, ctx):
+        """Show anti-spam settings"""
+        cfg = self.get_config(ctx.guild.id)
+        punishment = cfg["punishment"]
+        if punishment == "timeout":
+            punishment = f"{cfg['duration']} timeout"
+
+        embed = discord.Embed(
+            title="Anti-spam",
+            description=(
+                f"**Status:** {'enabled' if cfg['enabled'] else 'disabled'} → {punishment}\n"
+                f"**flood:** {cfg['flood'][0]} messages in {cfg['flood'][1]:g}s\n"
+                f"**duplicates:** {cfg['duplicates'][0]} identical messages in {cfg['duplicates'][1]:g}s\n"
+                f"**channel:** {cfg['channel'][0]} messages in {cfg['channel'][1]:g}s → {cfg['slowmode']}s slowmode\n"
+                f"**copies:** {cfg['copies'][0]} users posting the same text in {cfg['copies'][1]:g}s → earlier copies: {cfg['others']}\n"
+                f"**mentions:** {cfg['mentions']} per message\n"
+                f"**emojis:** {cfg['emojis']} per message"
+            ),
+            color=0x2b2d31
+        )
+        embed.set_footer(text="antispam on/off • antispam set <limit> <count> [seconds]")
+        await ctx.send(embed=embed)
+
+    @antispam.command(name="on")
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_on(self, ctx, *, args: str = None):
+        """Enable anti-spam"""
+        cfg = self.get_config(ctx.guild.id)
+        punishment, duration, others = cfg["punishment"], cfg["duration"], cfg["others"]
+        parts = args.split() if args else []
+        for i, part in enumerate(parts):
+            if part == "--do" and i + 1 < len(parts):
+                punishment = parts[i + 1].lower()
+            elif part == "--duration" and i + 1 < len(parts):
+                duration = parts[i + 1].lower()
+            elif part == "--others" and i + 1 < len(parts):
+                others = parts[i + 1].lower()
+
+        # Nothing touches the live config until every option checks out
+        if punishment not in ("delete", "timeout", "kick", "ban"):
+            return await ctx.deny("Punishment must be `delete`, `timeout`, `kick` or `ban`")
+        if not re.fullmatch(r"\d+[smhd]", duration):
+            return await ctx.deny("Duration must look like `30s`, `10m`, `2h` or `1d`")
+        if others not in ("delete", "punish"):
+            return await ctx.deny("`--others` must be `delete` or `punish`")
+
+        cfg.update(punishment=punishment, duration=duration, others=others, enabled=True)
+        await self._save_config()
+        await ctx.approve(f"Anti-spam enabled → {cfg['punishment']}")
+
+    @antispam.command(name="off")
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_off(self, ctx):
+        """Disable anti-spam"""
+        cfg = self.config.get(ctx.guild.id)
+        if not cfg or not cfg["enabled"]:
+            return await ctx.deny("Anti-spam is already disabled")
+
+        cfg["enabled"] = False
+        await self._save_config()
+        await ctx.approve("Anti-spam disabled")
+
+    @antispam.command(name="set")
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_set(self, ctx, limit: str = None, count: int = None, seconds: float = None):
+        """Change one of the anti-spam limits"""
+        limit = (limit or "").lower()
+        if limit not in LIMITS or count is None:
+            return await ctx.deny(f"Usage: `antispam set <{'/'.join(LIMITS)}> <count> [seconds]`")
+        if not 2 <= count <= 50:
+            return await ctx.deny("Count must be between 2 and 50")
+
+        cfg = self.get_config(ctx.guild.id)
+        if limit in ("mentions", "emojis"):
+            cfg[limit] = count
+            await self._save_config()
+            return await ctx.approve(f"**{limit}** limit set to {count} per message")
+
+        seconds = cfg[limit][1] if seconds is None else seconds
+        if not 1 <= seconds <= 300:
+            return await ctx.deny("Seconds must be between 1 and 300")
+
+        cfg[limit] = [count, seconds]
+        await self._save_config()
+        await ctx.approve(f"**{limit}** limit set to {count} in {seconds:g}s")
+
+
+async def setup(bot):
+    await bot.add_cog(AntiSpam(bot))
@@ -1,38 +1,34 @@
 import re
 import json
 import os
+import time
+import asyncio
 import discord
 from discord.ext import commands
 from datetime import datetime, timezone, timedelta
+from src.tools.wordfilter import FilterMatcher, parse_keyword, validate_regex
 
 # Storage file for filters
 FILTERS_FILE = "src/filters.json"
 
-INVITE_REGEX = r"(?i)\b(?:https?:\/\/)?(?:www\.)?(?:discord\.gg|discord(?:app)?\.com\/invite)\/[A-Za-z0-9-]+(?:\S*)?"
-
-
-def load_filters():
-    if not os.path.exists(FILTERS_FILE):
-        return {}
-    with open(FILTERS_FILE, "r") as f:
-        return json.load(f)
-
+KEYWORD_RULE_NAME = "Bot Keyword Filter"
+INVITE_RULE_NAME = "Bot Invite Filter"
 
-def save_filters(data):
-    os.makedirs(os.path.dirname(FILTERS_FILE), exist_ok=True)
-    with open(FILTERS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+# AutoMod limits for keyword rules
+MAX_RULE_KEYWORDS = 1000
+MAX_KEYWORD_LENGTH = 60
+MAX_KEYWORD_RULES = 6
+MAX_REGEX_FILTERS = 10
 
+MAX_IMPORT_BYTES = 256 * 1024
 
-def get_guild_filters(guild_id):
-    data = load_filters()
-    return data.get(str(guild_id), {"keywords": {}, "invite": None})
+# Punishment queue: violations from one user inside the window become one action
+PUNISH_WINDOW = 2.0
+PUNISH_CONCURRENCY = 4
+PUNISH_SEVERITY = {"delete": 0, "timeout": 1, "kick": 2, "ban": 3}
+REMOVED_COOLDOWN = 60  # seconds a kick or ban suppresses repeats from events still in flight
 
-
-def save_guild_filters(guild_id, guild_data):
-    data = load_filters()
-    data[str(guild_id)] = guild_data
-    save_filters(data)
+INVITE_REGEX = r"(?i)\b(?:https?:\/\/)?(?:www\.)?(?:discord\.gg|discord(?:app)?\.com\/invite)\/[A-Za-z0-9-]+(?:\S*)?"
 
 
 def parse_duration(duration: str) -> int:
@@ -113,6 +109,279 @@ class HelpPaginator(discord.ui.View):
 class Filter(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.filters: dict = {}  # guild_id -> {"keywords": {word: config}, "invite": config | None}
+        self.filters_loaded = asyncio.Event()
+        self.save_lock = asyncio.Lock()
+        self.matchers: dict = {}  # guild_id -> (community, FilterMatcher)
+        self.automod_rules: dict = {}  # guild_id -> {"keyword": {rule_id: AutoModRule}, "invite": AutoModRule | None}
+        self.unsynced: dict = {}  # guild_id -> keywords AutoMod couldn't take, checked locally instead
+        self.rule_fetches: set = set()  # guild ids with an AutoMod rule fetch in flight
+        self.sync_locks: dict = {}  # guild_id -> asyncio.Lock
+        self.punish_queues: dict = {}  # guild_id -> {user_id: pending punishment}, oldest first
+        self.punish_workers: dict = {}  # guild_id -> Task draining that queue
+        self.punished: dict = {}  # guild_id -> {user_id: (severity, expires_at)}
+        self.punish_semaphore = asyncio.Semaphore(PUNISH_CONCURRENCY)
+        bot.loop.create_task(self._load_filters())
+
+    async def _load_filters(self):
+        loop = asyncio.get_event_loop()
+
+        def _read():
+            try:
+                with open(FILTERS_FILE, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return {}
+            except Exception:
+                return {}
+
+        data = await loop.run_in_executor(None, _read)
+        self.filters = {int(guild_id): guild_data for guild_id, guild_data in data.items()}
+        self.filters_loaded.set()
+
+    async def _save_filters(self):
+        # Never overwrite the file with a half-loaded cache
+        await self.filters_loaded.wait()
+        loop = asyncio.get_event_loop()
+
+        def _write(payload):
+            os.makedirs(os.path.dirname(FILTERS_FILE), exist_ok=True)
+            with open(FILTERS_FILE, "w", encoding="utf-8") as f:
+                f.write(payload)
+
+        # Serialize on the loop so the executor never sees a dict mid-edit
+        payload = json.dumps({str(k): v for k, v in self.filters.items()}, indent=4)
+        async with self.save_lock:
+            await loop.run_in_executor(None, _write, payload)
+
+    def get_guild_filters(self, guild_id: int) -> dict:
+        """The cached filters for a guild; edits to it are kept until _save_filters"""
+        guild_data = self.filters.get(guild_id)
+        if guild_data is None:
+            guild_data = self.filters[guild_id] = {"keywords": {}, "invite": None}
+        return guild_data
+
+    async def _filters_changed(self, guild_id: int):
+        self.matchers.pop(guild_id, None)
+        await self._save_filters()
+
+    def get_matcher(self, guild: discord.Guild) -> FilterMatcher:
+        """The guild's compiled local filters, rebuilt only after an edit
+
+        Community guilds have keywords and invites enforced by AutoMod, so only
+        their regexes run here; every other guild gets all of its filters locally.
+        """
+        community = "COMMUNITY" in guild.features
+        cached = self.matchers.get(guild.id)
+        if cached is not None and cached[0] == community:
+            return cached[1]
+
+        guild_data = self.filters.get(guild.id) or {}
+        keywords = []
+        patterns = []
+        for pattern in guild_data.get("regex", {}):
+            # Patterns saved before the backtracking checks existed are skipped rather than run
+            error = validate_regex(pattern)
+            if error:
+                print(f"[Filter] Skipping regex {pattern!r} in guild {guild.id}: {error}")
+                continue
+            patterns.append((("regex", pattern), pattern))
+        if not community:
+            keywords = [(("keyword", word), word) for word in guild_data.get("keywords", {})]
+            if guild_data.get("invite"):
+                patterns.append((("invite", None), INVITE_REGEX))
+        else:
+            unsynced = self.unsynced.get(guild.id)
+            if unsynced is None:
+                unsynced = self._unsynced_keywords(guild)
+            keywords = [(("keyword", word), word) for word in unsynced]
+
+        matcher = FilterMatcher(keywords, patterns)
+        self.matchers[guild.id] = (community, matcher)
+        return matcher
+
+    def _unsynced_keywords(self, guild: discord.Guild) -> set:
+        """Work out which stored keywords AutoMod doesn't have, e.g. after a restart"""
+        keywords = set(self.filters.get(guild.id, {}).get("keywords", {}))
+        state = self.automod_rules.get(guild.id)
+        if state is None:
+            # Check everything here until the rules arrive; messages AutoMod blocks never reach us anyway
+            if guild.id not in self.rule_fetches:
+                self.rule_fetches.add(guild.id)
+                self.bot.loop.create_task(self._fetch_unsynced(guild))
+            return keywords
+
+        synced = set().union(*(rule.trigger.keyword_filter or () for rule in state["keyword"].values()))
+        unsynced = self.unsynced[guild.id] = keywords - synced
+        return unsynced
+
+    async def _fetch_unsynced(self, guild: discord.Guild):
+        try:
+            await self.get_automod_rules(guild)
+        except discord.HTTPException as e:
+            print(f"[Filter] Error fetching AutoMod rules for {guild.id}: {e}")
+            # Keep checking every keyword locally rather than refetching on each message
+            self.unsynced[guild.id] = set(self.filters.get(guild.id, {}).get("keywords", {}))
+        finally:
+            self.rule_fetches.discard(guild.id)
+        self.matchers.pop(guild.id, None)
+
+    async def get_automod_rules(self, guild: discord.Guild) -> dict:
+        """The bot's AutoMod rules for a guild, fetched once and kept current by rule events"""
+        state = self.automod_rules.get(guild.id)
+        if state is None:
+            rules = await guild.fetch_automod_rules()
+            state = {
+                "keyword": {rule.id: rule for rule in rules if rule.name.startswith(KEYWORD_RULE_NAME)},
+                "invite": discord.utils.get(rules, name=INVITE_RULE_NAME)
+            }
+            self.automod_rules[guild.id] = state
+        return state
+
+    async def sync_keywords(self, guild: discord.Guild) -> int:
+        """Bring the guild's AutoMod keyword rules in line with its filters, returning the API calls made"""
+        async with self.sync_locks.setdefault(guild.id, asyncio.Lock()):
+            try:
+                return await self._sync_keywords(guild)
+            except discord.HTTPException:
+                # A failed edit leaves the cache unsure of what Discord has, so refetch next time
+                self.automod_rules.pop(guild.id, None)
+                raise
+            finally:
+                self.matchers.pop(guild.id, None)
+
+    async def _sync_keywords(self, guild: discord.Guild) -> int:
+        state = await self.get_automod_rules(guild)
+        keywords = self.filters.get(guild.id, {}).get("keywords", {})
+        wanted = {word for word in keywords if len(word) <= MAX_KEYWORD_LENGTH}
+
+        # Diff locally: drop what was removed, then top up existing rules before creating new ones
+        current = {rule_id: set(rule.trigger.keyword_filter or []) for rule_id, rule in state["keyword"].items()}
+        target = {rule_id: words & wanted for rule_id, words in current.items()}
+        missing = sorted(wanted - set().union(*current.values()), reverse=True)
+        for words in target.values():
+            while missing and len(words) < MAX_RULE_KEYWORDS:
+                words.add(missing.pop())
+
+        calls = 0
+        for rule_id, words in target.items():
+            if words == current[rule_id]:
+                continue
+            rule = state["keyword"][rule_id]
+            if words:
+                state["keyword"][rule_id] = await rule.edit(
+                    trigger=discord.AutoModTrigger(
+                        type=discord.AutoModRuleTriggerType.keyword,
+                        keyword_filter=sorted(words)
+                    ),
+                    reason="Bot managed filter"
+                )
+            else:
+                await rule.delete(reason="Bot managed filter")
+                del state["keyword"][rule_id]
+            calls += 1
+
+        missing.reverse()
+        names = {rule.name for rule in state["keyword"].values()}
+        number = 1
+        while missing and len(state["keyword"]) < MAX_KEYWORD_RULES:
+            name = KEYWORD_RULE_NAME if number == 1 else f"{KEYWORD_RULE_NAME} {number}"
+            number += 1
+            if name in names:
+                continue
+            chunk, missing = missing[:MAX_RULE_KEYWORDS], missing[MAX_RULE_KEYWORDS:]
+            rule = await guild.create_automod_rule(
+                name=name,
+                event_type=discord.AutoModRuleEventType.message_send,
+                trigger=discord.AutoModTrigger(
+                    type=discord.AutoModRuleTriggerType.keyword,
+                    keyword_filter=chunk
+                ),
+                actions=[discord.AutoModRuleAction(type=discord.AutoModRuleActionType.block_message)],
+                enabled=True,
+                reason="Bot managed filter"
+            )
+            state["keyword"][rule.id] = rule
+            names.add(name)
+            calls += 1
+
+        self.unsynced[guild.id] = set(missing) | (set(keywords) - wanted)
+        return calls
+
+    async def sync_invite(self, guild: discord.Guild, enabled: bool):
+        state = await self.get_automod_rules(guild)
+        if enabled and state["invite"] is None:
+            state["invite"] = await guild.create_automod_rule(
+                name=INVITE_RULE_NAME,
+                event_type=discord.AutoModRuleEventType.message_send,
+                trigger=discord.AutoModTrigger(
+                    type=discord.AutoModRuleTriggerType.keyword,
+                    regex_patterns=[INVITE_REGEX]
+                ),
+                actions=[discord.AutoModRuleAction(type=discord.AutoModRuleActionType.block_message)],
+                enabled=True,
+                reason="Bot managed invite filter"
+            )
+        elif not enabled and state["invite"] is not None:
+            await state["invite"].delete()
+            state["invite"] = None
+
+    def _cache_rule(self, rule: discord.AutoModRule):
+        state = self.automod_rules.get(rule.guild.id)
+        if state is None:
+            return
+        state["keyword"].pop(rule.id, None)
+        if state["invite"] is not None and state["invite"].id == rule.id:
+            state["invite"] = None
+        if rule.name.startswith(KEYWORD_RULE_NAME):
+            state["keyword"][rule.id] = rule
+        elif rule.name == INVITE_RULE_NAME:
+            state["invite"] = rule
+
+    @commands.Cog.listener()
+    async def on_automod_rule_create(self, rule: discord.AutoModRule):
+        self._cache_rule(rule)
+
+    @commands.Cog.listener()
+    async def on_automod_rule_update(self, rule: discord.AutoModRule):
+        self._cache_rule(rule)
+
+    @commands.Cog.listener()
+    async def on_automod_rule_delete(self, rule: discord.AutoModRule):
+        state = self.automod_rules.get(rule.guild.id)
+        if state is None:
+            return
+        state["keyword"].pop(rule.id, None)
+        if state["invite"] is not None and state["invite"].id == rule.id:
+            state["invite"] = None
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        """Move a guild's filters into AutoMod once it turns Community on"""
+        if "COMMUNITY" in before.features or "COMMUNITY" not in after.features:
+            return
+        guild_data = self.filters.get(after.id)
+        if not guild_data:
+            return
+        try:
+            if guild_data.get("keywords"):
+                await self.sync_keywords(after)
+            if guild_data.get("invite"):
+                await self.sync_invite(after, True)
+        except Exception as e:
+            print(f"[Filter] Error syncing AutoMod for {after.id}: {e}")
+
+    def parse_action(self, parts):
+        """Read `--do`, `--reason` and `--duration` flags out of split arguments"""
+        punishment, reason, duration = "delete", None, "10m"
+        for i, part in enumerate(parts):
+            if part == "--do" and i + 1 < len(parts):
+                punishment = parts[i + 1].lower()
+            elif part == "--reason" and i + 1 < len(parts):
+                reason = parts[i + 1]
+            elif part == "--duration" and i + 1 < len(parts):
+                duration = parts[i + 1]
+        return punishment, reason, duration
 
     def build_help_pages(self, ctx):
         prefix = "-"
@@ -139,7 +408,7 @@ class Filter(commands.Cog):
         e2.description = "Add a keyword to the filter list"
         e2.add_field(
             name="\u200b",
-            value=f"```Syntax: {prefix}filter add <word> [--do timeout/kick/ban] [--duration 10m]\nExample: {prefix}filter add badword --do timeout --duration 15m```",
+            value=f"```Syntax: {prefix}filter add <word> [--do timeout/kick/ban] [--duration 10m]\nExample: {prefix}filter add *badword* --do timeout --duration 15m```",
             inline=False
         )
         e2.set_thumbnail(url=self.bot.user.display_avatar.url)
@@ -197,6 +466,32 @@ class Filter(commands.Cog):
         e6.set_thumbnail(url=self.bot.user.display_avatar.url)
         pages.append(e6)
 
+        # Page 7: filter regex
+        e7 = discord.Embed(color=0x2b2d31)
+        e7.set_author(name=self.bot.user.name, icon_url=self.bot.user.display_avatar.url)
+        e7.title = "Command: filter regex"
+        e7.description = "Add or remove a regex filter, checked by the bot itself"
+        e7.add_field(
+            name="\u200b",
+            value=f"```Syntax: {prefix}filter regex add <pattern> [--do timeout/kick/ban] [--duration 10m]\n{prefix}filter regex remove <pattern>\nExample: {prefix}filter regex add fr[e3]{{2}}\\s*nitro --do kick```",
+            inline=False
+        )
+        e7.set_thumbnail(url=self.bot.user.display_avatar.url)
+        pages.append(e7)
+
+        # Page 8: filter import
+        e8 = discord.Embed(color=0x2b2d31)
+        e8.set_author(name=self.bot.user.name, icon_url=self.bot.user.display_avatar.url)
+        e8.title = "Command: filter import"
+        e8.description = "Add keywords from an attached text file, one per line"
+        e8.add_field(
+            name="\u200b",
+            value=f"```Syntax: {prefix}filter import [--replace] [--do timeout/kick/ban] [--duration 10m]\nExample: {prefix}filter import --replace --do timeout```",
+            inline=False
+        )
+        e8.set_thumbnail(url=self.bot.user.display_avatar.url)
+        pages.append(e8)
+
         return pages
 
     @commands.Cog.listener()
@@ -214,7 +509,9 @@ class Filter(commands.Cog):
         if not matched_text:
             return
 
-        guild_data = get_guild_filters(guild.id)
+        guild_data = self.filters.get(guild.id)
+        if not guild_data:
+            return
         config = None
 
         # Check keyword filters
@@ -231,16 +528,119 @@ class Filter(commands.Cog):
         if not config:
             return
 
+        self.punish(guild, user, config, matched_text)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Enforce the filters AutoMod doesn't cover for this guild"""
+        if message.author.bot or not message.guild or not message.content:
+            return
+        guild_data = self.filters.get(message.guild.id)
+        if not guild_data:
+            return
+        # AutoMod never applies to members who can manage the server, so neither do we
+        if not isinstance(message.author, discord.Member) or message.author.guild_permissions.manage_guild:
+            return
+
+        matcher = self.get_matcher(message.guild)
+        if not matcher:
+            return
+        hit = matcher.match(message.content)
+        if hit is None:
+            return
+
+        (kind, key), matched_text = hit
+        if kind == "keyword":
+            config = guild_data.get("keywords", {}).get(key)
+        elif kind == "regex":
+            config = guild_data.get("regex", {}).get(key)
+        else:
+            config = guild_data.get("invite")
+        if not config:
+            return
+
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+        self.punish(message.guild, message.author, config, matched_text)
+
+    async def cog_before_invoke(self, ctx):
+        # _load_filters replaces the whole cache, so an edit made before it finishes would be lost
+        await self.filters_loaded.wait()
+
+    async def cog_unload(self):
+        for task in self.punish_workers.values():
+            task.cancel()
+
+    def punish(self, guild, user, config, trigger):
+        """Queue a punishment; repeats for the same user within PUNISH_WINDOW collapse into the harshest one"""
         punishment = config.get("punishment", "delete")
-        reason = config.get("reason", "AutoMod")
-        duration = config.get("duration", "10m")
+        severity = PUNISH_SEVERITY.get(punishment, 0)
+        if not severity:
+            return
+
+        now = time.monotonic()
+        already = self.punished.get(guild.id, {}).get(user.id)
+        if already and already[1] > now and already[0] >= severity:
+            return
 
+        queue = self.punish_queues.setdefault(guild.id, {})
+        entry = queue.get(user.id)
+        if entry is None:
+            entry = queue[user.id] = {"user": user, "config": config, "trigger": trigger, "count": 0, "due": now + PUNISH_WINDOW}
+        elif (severity, parse_duration(config.get("duration", "10m"))) > (
+            PUNISH_SEVERITY.get(entry["config"].get("punishment"), 0),
+            parse_duration(entry["config"].get("duration", "10m"))
+        ):
+            entry["config"], entry["trigger"] = config, trigger
+        entry["count"] += 1
+
+        if guild.id not in self.punish_workers:
+            self.punish_workers[guild.id] = self.bot.loop.create_task(self._drain_punishments(guild))
+
+    async def _drain_punishments(self, guild):
+        queue = self.punish_queues[guild.id]
         try:
-            await self.apply_punishment(guild, user, punishment, reason, duration, matched_text)
-        except discord.Forbidden:
-            print(f"[Filter] Missing permissions to {punishment} {user}")
-        except Exception as e:
-            print(f"[Filter] Error: {e}")
+            while queue:
+                # Entries are kept in arrival order, so the first one is always due first
+                delay = next(iter(queue.values()))["due"] - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                now = time.monotonic()
+                ready = [user_id for user_id, entry in queue.items() if entry["due"] <= now]
+                await asyncio.gather(*(self._run_punishment(guild, queue.pop(user_id)) for user_id in ready))
+
+                punished = self.punished.get(guild.id, {})
+                for user_id in [u for u, (_, expires_at) in punished.items() if expires_at <= now]:
+                    del punished[user_id]
+        finally:
+            self.punish_workers.pop(guild.id, None)
+            if not queue:
+                self.punish_queues.pop(guild.id, None)
+
+    async def _run_punishment(self, guild, entry):
+        user, config, count = entry["user"], entry["config"], entry["count"]
+        punishment = config.get("punishment", "delete")
+        reason = config.get("reason", "AutoMod")
+        duration = config.get("duration", "10m")
+        if count > 1:
+            reason = f"{reason} ({count} violations)"
+
+        # Anything less severe that arrives while this is still in effect is redundant
+        seconds = parse_duration(duration) if punishment == "timeout" else REMOVED_COOLDOWN
+        self.punished.setdefault(guild.id, {})[user.id] = (PUNISH_SEVERITY[punishment], time.monotonic() + seconds)
+
+        async with self.punish_semaphore:
+            try:
+                await self.apply_punishment(guild, user, punishment, reason, duration, entry["trigger"])
+                if count > 1:
+                    print(f"[Filter] Coalesced {count} violations from {user} into one {punishment}")
+            except discord.Forbidden:
+                print(f"[Filter] Missing permissions to {punishment} {user}")
+            except Exception as e:
+                print(f"[Filter] Error: {e}")
 
     async def apply_punishment(self, guild, user, punishment, reason, duration, trigger):
         if punishment == "timeout":
@@ -273,24 +673,14 @@ class Filter(commands.Cog):
         if not args:
             return await ctx.deny("Usage: `filter add <word> [--do timeout/kick/ban] [--duration 10m]`")
 
-        if "COMMUNITY" not in ctx.guild.features:
-            return await ctx.deny("AutoMod requires **Community** to be enabled for this server")
-
         parts = args.split()
         trigger = parts[0].lower()
-        punishment = "delete"
-        reason = "AutoMod"
-        duration = "10m"
-
-        for i, part in enumerate(parts):
-            if part == "--do" and i + 1 < len(parts):
-                punishment = parts[i + 1].lower()
-            elif part == "--reason" and i + 1 < len(parts):
-                reason = parts[i + 1]
-            elif part == "--duration" and i + 1 < len(parts):
-                duration = parts[i + 1]
+        if not parse_keyword(trigger)[0]:
+            return await ctx.deny("Keywords need at least one character besides `*`")
+        punishment, reason, duration = self.parse_action(parts)
+        reason = reason or "AutoMod"
 
-        guild_data = get_guild_filters(ctx.guild.id)
+        guild_data = self.get_guild_filters(ctx.guild.id)
         if "keywords" not in guild_data:
             guild_data["keywords"] = {}
 
@@ -299,34 +689,13 @@ class Filter(commands.Cog):
             "reason": reason,
             "duration": duration
         }
-        save_guild_filters(ctx.guild.id, guild_data)
+        await self._filters_changed(ctx.guild.id)
+
+        if "COMMUNITY" not in ctx.guild.features:
+            return await ctx.approve(f"Filter added: `{trigger}` → {punishment}")
 
         try:
-            rules = await ctx.guild.fetch_automod_rules()
-            rule = discord.utils.get(rules, name="Bot Keyword Filter")
-
-            if rule:
-                triggers = list(rule.trigger.keyword_filter or [])
-                if trigger not in triggers:
-                    triggers.append(trigger)
-                    await rule.edit(
-                        trigger=discord.AutoModTrigger(
-                            type=discord.AutoModRuleTriggerType.keyword,
-                            keyword_filter=triggers
-                        )
-                    )
-            else:
-                await ctx.guild.create_automod_rule(
-                    name="Bot Keyword Filter",
-                    event_type=discord.AutoModRuleEventType.message_send,
-                    trigger=discord.AutoModTrigger(
-                        type=discord.AutoModRuleTriggerType.keyword,
-                        keyword_filter=[trigger]
-                    ),
-                    actions=[discord.AutoModRuleAction(type=discord.AutoModRuleActionType.block_message)],
-                    enabled=True,
-                    reason="Bot managed filter"
-                )
+            await self.sync_keywords(ctx.guild)
         except Exception as e:
             return await ctx.deny(f"Failed to sync AutoMod: {e}")
 
@@ -340,47 +709,94 @@ class Filter(commands.Cog):
             return await ctx.deny("Usage: `filter remove <word>`")
 
         trigger = trigger.lower()
-        guild_data = get_guild_filters(ctx.guild.id)
+        guild_data = self.get_guild_filters(ctx.guild.id)
 
         if trigger not in guild_data.get("keywords", {}):
             return await ctx.deny(f"No filter found for `{trigger}`")
 
         del guild_data["keywords"][trigger]
-        save_guild_filters(ctx.guild.id, guild_data)
+        await self._filters_changed(ctx.guild.id)
+
+        if "COMMUNITY" not in ctx.guild.features:
+            return await ctx.approve(f"Filter removed: `{trigger}`")
 
         try:
-            rules = await ctx.guild.fetch_automod_rules()
-            rule = discord.utils.get(rules, name="Bot Keyword Filter")
-            if rule and rule.trigger.keyword_filter:
-                triggers = list(rule.trigger.keyword_filter)
-                if trigger in triggers:
-                    triggers.remove(trigger)
-                    if triggers:
-                        await rule.edit(
-                            trigger=discord.AutoModTrigger(
-                                type=discord.AutoModRuleTriggerType.keyword,
-                                keyword_filter=triggers
-                            )
-                        )
-                    else:
-                        await rule.delete()
+            await self.sync_keywords(ctx.guild)
         except Exception as e:
             print(f"[Filter] Error removing from AutoMod: {e}")
 
         await ctx.approve(f"Filter removed: `{trigger}`")
 
+    @filter_group.command(name="import")
+    @commands.has_permissions(manage_guild=True)
+    async def filter_import(self, ctx, *, args: str = None):
+        """Add keyword filters in bulk from an attached text file"""
+        if not ctx.message.attachments:
+            return await ctx.deny("Attach a text file with one keyword per line: `filter import [--replace] [--do timeout/kick/ban] [--duration 10m]`")
+
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_IMPORT_BYTES:
+            return await ctx.deny(f"Keyword files are limited to {MAX_IMPORT_BYTES // 1024}KB")
+        try:
+            text = (await attachment.read()).decode("utf-8")
+        except UnicodeDecodeError:
+            return await ctx.deny("The file must be UTF-8 text")
+
+        words = []
+        for line in text.splitlines():
+            for word in line.split(","):
+                word = word.strip().lower()
+                if parse_keyword(word)[0]:
+                    words.append(word)
+        words = list(dict.fromkeys(words))
+        if not words:
+            return await ctx.deny("No keywords found in that file")
+
+        parts = args.split() if args else []
+        punishment, reason, duration = self.parse_action(parts)
+
+        guild_data = self.get_guild_filters(ctx.guild.id)
+        keywords = guild_data.setdefault("keywords", {})
+        before = set(keywords)
+        removed = before - set(words) if "--replace" in parts else set()
+        for word in removed:
+            del keywords[word]
+        for word in words:
+            keywords[word] = {
+                "punishment": punishment,
+                "reason": reason or "AutoMod",
+                "duration": duration
+            }
+        await self._filters_changed(ctx.guild.id)
+
+        summary = f"Imported **{len(words)}** keywords (**{len(set(words) - before)}** new, **{len(removed)}** removed) → {punishment}"
+        if "COMMUNITY" not in ctx.guild.features:
+            return await ctx.approve(summary)
+
+        try:
+            calls = await self.sync_keywords(ctx.guild)
+        except Exception as e:
+            return await ctx.warn(f"{summary}, but syncing AutoMod failed: {e}")
+
+        summary += f" in **{calls}** AutoMod update{'s' if calls != 1 else ''}"
+        unsynced = len(self.unsynced.get(ctx.guild.id, ()))
+        if unsynced:
+            summary += f". **{unsynced}** didn't fit in AutoMod and are checked by the bot instead"
+        await ctx.approve(summary)
+
     @filter_group.command(name="list")
     @commands.has_permissions(manage_guild=True)
     async def filter_list(self, ctx):
         """List all keyword filters"""
-        guild_data = get_guild_filters(ctx.guild.id)
+        guild_data = self.get_guild_filters(ctx.guild.id)
         keywords = guild_data.get("keywords", {})
+        regexes = guild_data.get("regex", {})
 
-        if not keywords:
+        if not keywords and not regexes:
             return await ctx.deny("No filters set")
 
         lines = []
-        for word, cfg in keywords.items():
+        for word, cfg in [*keywords.items(), *((f"/{p}/", c) for p, c in regexes.items())]:
             punishment = cfg.get("punishment", "delete")
             if punishment == "timeout":
                 dur = cfg.get("duration", "10m")
@@ -388,13 +804,17 @@ class Filter(commands.Cog):
             else:
                 lines.append(f"`{word}` → {punishment}")
 
-        embed = discord.Embed(
-            title="Keyword Filters",
-            description="\n".join(lines),
-            color=0x2b2d31
-        )
-        embed.set_footer(text=f"Total: {len(keywords)}")
-        await ctx.send(embed=embed)
+        # Imports can add hundreds of keywords, so page them like the help menu
+        pages = [
+            discord.Embed(title="Keyword Filters", description="\n".join(lines[i:i + 20]), color=0x2b2d31)
+            for i in range(0, len(lines), 20)
+        ]
+        if len(pages) == 1:
+            pages[0].set_footer(text=f"Total: {len(lines)}")
+            return await ctx.send(embed=pages[0])
+        pages[0].set_footer(text=f"Page 1/{len(pages)}")
+        view = HelpPaginator(pages, ctx.author)
+        view.message = await ctx.send(embed=pages[0], view=view)
 
     @filter_group.group(name="invite", invoke_without_command=True)
     @commands.has_permissions(manage_guild=True)
@@ -406,44 +826,21 @@ class Filter(commands.Cog):
     @commands.has_permissions(manage_guild=True)
     async def filter_invite_on(self, ctx, *, args: str = None):
         """Enable invite filtering"""
-        if "COMMUNITY" not in ctx.guild.features:
-            return await ctx.deny("AutoMod requires **Community** to be enabled")
+        punishment, _, duration = self.parse_action(args.split() if args else [])
 
-        punishment = "delete"
-        duration = "10m"
-
-        if args:
-            parts = args.split()
-            for i, part in enumerate(parts):
-                if part == "--do" and i + 1 < len(parts):
-                    punishment = parts[i + 1].lower()
-                elif part == "--duration" and i + 1 < len(parts):
-                    duration = parts[i + 1]
-
-        guild_data = get_guild_filters(ctx.guild.id)
+        guild_data = self.get_guild_filters(ctx.guild.id)
         guild_data["invite"] = {
             "punishment": punishment,
             "reason": "Invite link",
             "duration": duration
         }
-        save_guild_filters(ctx.guild.id, guild_data)
+        await self._filters_changed(ctx.guild.id)
 
-        try:
-            rules = await ctx.guild.fetch_automod_rules()
-            rule = discord.utils.get(rules, name="Bot Invite Filter")
+        if "COMMUNITY" not in ctx.guild.features:
+            return await ctx.approve(f"Invite filter enabled → {punishment}")
 
-            if not rule:
-                await ctx.guild.create_automod_rule(
-                    name="Bot Invite Filter",
-                    event_type=discord.AutoModRuleEventType.message_send,
-                    trigger=discord.AutoModTrigger(
-                        type=discord.AutoModRuleTriggerType.keyword,
-                        regex_patterns=[INVITE_REGEX]
-                    ),
-                    actions=[discord.AutoModRuleAction(type=discord.AutoModRuleActionType.block_message)],
-                    enabled=True,
-                    reason="Bot managed invite filter"
-                )
+        try:
+            await self.sync_invite(ctx.guild, True)
         except Exception as e:
             return await ctx.deny(f"Failed to sync AutoMod: {e}")
 
@@ -453,24 +850,71 @@ class Filter(commands.Cog):
     @commands.has_permissions(manage_guild=True)
     async def filter_invite_off(self, ctx):
         """Disable invite filtering"""
-        guild_data = get_guild_filters(ctx.guild.id)
+        guild_data = self.get_guild_filters(ctx.guild.id)
 
         if "invite" not in guild_data:
             return await ctx.deny("Invite filter is already disabled")
 
         del guild_data["invite"]
-        save_guild_filters(ctx.guild.id, guild_data)
+        await self._filters_changed(ctx.guild.id)
+
+        if "COMMUNITY" not in ctx.guild.features:
+            return await ctx.approve("Invite filter disabled")
 
         try:
-            rules = await ctx.guild.fetch_automod_rules()
-            rule = discord.utils.get(rules, name="Bot Invite Filter")
-            if rule:
-                await rule.delete()
+            await self.sync_invite(ctx.guild, False)
         except Exception as e:
             print(f"[Filter] Error removing invite rule: {e}")
 
         await ctx.approve("Invite filter disabled")
 
+    @filter_group.group(name="regex", invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def filter_regex(self, ctx):
+        """Regex filter commands"""
+        await ctx.approve("`filter regex add <pattern> [--do timeout/kick/ban]` or `filter regex remove <pattern>`")
+
+    @filter_regex.command(name="add")
+    @commands.has_permissions(manage_guild=True)
+    async def filter_regex_add(self, ctx, *, args: str = None):
+        """Add a regex filter"""
+        if not args:
+            return await ctx.deny("Usage: `filter regex add <pattern> [--do timeout/kick/ban] [--duration 10m]`")
+
+        parts = args.split()
+        pattern = parts[0]
+        error = validate_regex(pattern)
+        if error:
+            return await ctx.deny(error)
+        punishment, reason, duration = self.parse_action(parts)
+
+        guild_data = self.get_guild_filters(ctx.guild.id)
+        regexes = guild_data.setdefault("regex", {})
+        if pattern not in regexes and len(regexes) >= MAX_REGEX_FILTERS:
+            return await ctx.deny(f"You can only have {MAX_REGEX_FILTERS} regex filters")
+        regexes[pattern] = {
+            "punishment": punishment,
+            "reason": reason or "AutoMod",
+            "duration": duration
+        }
+        await self._filters_changed(ctx.guild.id)
+        await ctx.approve(f"Regex filter added: `{pattern}` → {punishment}")
+
+    @filter_regex.command(name="remove")
+    @commands.has_permissions(manage_guild=True)
+    async def filter_regex_remove(self, ctx, pattern: str = None):
+        """Remove a regex filter"""
+        if not pattern:
+            return await ctx.deny("Usage: `filter regex remove <pattern>`")
+
+        guild_data = self.get_guild_filters(ctx.guild.id)
+        if pattern not in guild_data.get("regex", {}):
+            return await ctx.deny(f"No regex filter found for `{pattern}`")
+
+        del guild_data["regex"][pattern]
+        await self._filters_changed(ctx.guild.id)
+        await ctx.approve(f"Regex filter removed: `{pattern}`")
+
 
 async def setup(bot):
     await bot.add_cog(Filter(bot))
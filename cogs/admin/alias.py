@@ -1,10 +1,47 @@
 import discord
-import copy
+import json
+import re
+import time
 from discord.ext import commands
+from discord.ext.commands.view import StringView
 from src.config import Config
+from src.tools.context import CustomContext
 from datetime import datetime, timezone
 
 
+MAX_MACRO_STEPS = 5
+PLACEHOLDER = re.compile(r"\{(args|[1-9])\}")
+BRACES = re.compile(r"\{[^{}]*\}")
+
+
+def compile_template(text: str) -> list:
+    """Split step arguments into literal strings and placeholder ints ({1}-{9}, 0 for {args})"""
+    invalid = [b for b in BRACES.findall(text) if not PLACEHOLDER.fullmatch(b)]
+    if invalid:
+        raise ValueError(f"Unknown placeholder `{invalid[0]}`, use `{{1}}`-`{{9}}` or `{{args}}`")
+
+    segments = []
+    for i, part in enumerate(PLACEHOLDER.split(text)):
+        if i % 2:
+            segments.append(0 if part == "args" else int(part))
+        elif part:
+            segments.append(part)
+    return segments
+
+
+def render_template(segments: list, args: list, raw_args: str) -> str:
+    """Fill a compiled template with the arguments a macro was run with"""
+    out = []
+    for segment in segments:
+        if isinstance(segment, str):
+            out.append(segment)
+        elif segment == 0:
+            out.append(raw_args)
+        elif segment <= len(args):
+            out.append(args[segment - 1])
+    return "".join(out)
+
+
 class ClearConfirmView(discord.ui.View):
     def __init__(self, author: discord.Member, cog, guild_id: int):
         super().__init__(timeout=30)
@@ -64,6 +101,7 @@ class Alias(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.cache = {}  # guild_id -> {alias: command}
+        self.macros = {}  # guild_id -> {name: {'steps': [{'command', 'segments'}], 'plan', 'runs', 'total_ms'}}
         bot.loop.create_task(self.setup_table())
 
     async def setup_table(self):
@@ -83,6 +121,15 @@ class Alias(commands.Cog):
                         UNIQUE KEY unique_alias (guild_id, alias_name)
                     )
                 """)
+                await cur.execute("""
+                    CREATE TABLE IF NOT EXISTS command_macros (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        guild_id BIGINT NOT NULL,
+                        macro_name VARCHAR(100) NOT NULL,
+                        plan TEXT NOT NULL,
+                        UNIQUE KEY unique_macro (guild_id, macro_name)
+                    )
+                """)
 
         await self.load_cache()
 
@@ -101,42 +148,107 @@ class Alias(commands.Cog):
                         self.cache[guild_id] = {}
                     self.cache[guild_id][alias_name] = command_name
 
+                await cur.execute("SELECT guild_id, macro_name, plan FROM command_macros")
+                rows = await cur.fetchall()
+
+                for guild_id, macro_name, plan in rows:
+                    try:
+                        macro = self.load_macro(json.loads(plan))
+                    except ValueError as e:
+                        print(f"Skipping macro {macro_name} in {guild_id}: {e}")
+                        continue
+                    if guild_id not in self.macros:
+                        self.macros[guild_id] = {}
+                    self.macros[guild_id][macro_name] = macro
+
     def resolve_alias(self, guild_id: int, alias: str) -> str | None:
-        """Get the real command for an alias"""
+        """Get the real command for an alias
+
+        Called from SlitBot.get_context when the invoked name isn't a command,
+        so aliased commands are parsed and dispatched once like any other.
+        """
         if guild_id not in self.cache:
             return None
         return self.cache[guild_id].get(alias.lower())
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Listen for alias usage"""
-        if message.author.bot or not message.guild:
-            return
-
-        prefixes = await self.bot.get_prefix(message)
-        if isinstance(prefixes, str):
-            prefixes = [prefixes]
-
-        used_prefix = next((p for p in prefixes if message.content.startswith(p)), None)
-        if not used_prefix:
-            return
-
-        tokens = message.content[len(used_prefix):].split(maxsplit=1)
-        if not tokens:
-            return
-
-        alias = tokens[0].lower()
-        real = self.resolve_alias(message.guild.id, alias)
-
+    def resolve_context(self, ctx: commands.Context):
+        """Point a context whose invoked name isn't a command at a guild alias or macro"""
+        name = ctx.invoked_with.lower()
+        real = self.resolve_alias(ctx.guild.id, name)
         if real:
-            rest = tokens[1] if len(tokens) > 1 else ""
-            new_content = f"{used_prefix}{real} {rest}".strip()
-
-            fake = copy.copy(message)
-            fake.content = new_content
-
-            ctx = await self.bot.get_context(fake)
-            await self.bot.invoke(ctx)
+            ctx.command = self.bot.get_command(real)
+        elif name in self.macros.get(ctx.guild.id, {}):
+            # Rewind so `macro run` reads the macro name as its first argument
+            ctx.view.undo()
+            ctx.command = self.macro_run
+
+    def parse_macro(self, source: str) -> list:
+        """Parse `cmd args; cmd args` into a plan of qualified command names and argument templates"""
+        plan = []
+        for step in filter(None, (part.strip() for part in source.split(";"))):
+            words = step.split()
+            command = self.bot.get_command(words[0].lower())
+            consumed = 1
+            while isinstance(command, commands.Group) and consumed < len(words):
+                sub = command.get_command(words[consumed].lower())
+                if not sub:
+                    break
+                command, consumed = sub, consumed + 1
+            if not command:
+                raise ValueError(f"Command **{words[0]}** not found")
+            if command.root_parent in (self.macro, self.alias) or command in (self.macro, self.alias):
+                raise ValueError("Macros can't run alias or macro commands")
+            args = step.split(maxsplit=consumed)[consumed] if len(words) > consumed else ""
+            plan.append({'command': command.qualified_name, 'args': args})
+
+        if not plan:
+            raise ValueError("A macro needs at least one step")
+        if len(plan) > MAX_MACRO_STEPS:
+            raise ValueError(f"Macros can have at most {MAX_MACRO_STEPS} steps")
+        return plan
+
+    def load_macro(self, plan: list) -> dict:
+        """Compile a stored plan into checked command names and pre-split argument templates
+
+        Only names are kept; commands are looked up when a step runs so a cog reload can't leave stale ones behind.
+        """
+        steps = []
+        for step in plan:
+            if not self.bot.get_command(step['command']):
+                raise ValueError(f"Command **{step['command']}** no longer exists")
+            steps.append({'command': step['command'], 'segments': compile_template(step['args'])})
+        return {'steps': steps, 'plan': plan, 'runs': 0, 'total_ms': 0.0}
+
+    async def run_macro(self, ctx, macro: dict, raw_args: str):
+        """Dispatch each step of a macro, stopping at the first one that fails"""
+        args = raw_args.split()
+        started = time.perf_counter()
+        for step in macro['steps']:
+            command = self.bot.get_command(step['command'])
+            if not command:
+                await ctx.warn(f"Command **{step['command']}** no longer exists")
+                break
+            step_ctx = CustomContext(
+                message=ctx.message,
+                bot=self.bot,
+                view=StringView(render_template(step['segments'], args, raw_args)),
+                prefix=ctx.prefix,
+                command=command,
+                invoked_with=command.name
+            )
+            # Invoking a subcommand directly skips its groups' checks, so run them first
+            try:
+                for parent in reversed(command.parents):
+                    if not await parent.can_run(step_ctx):
+                        raise commands.CheckFailure(f"The check functions for command {parent.qualified_name} failed.")
+            except commands.CommandError as e:
+                self.bot.dispatch("command_error", step_ctx, e)
+                break
+            await self.bot.invoke(step_ctx)
+            if step_ctx.command_failed:
+                break
+        macro['runs'] += 1
+        macro['total_ms'] += (time.perf_counter() - started) * 1000
 
     @commands.group(name="alias", invoke_without_command=True)
     @commands.cooldown(1, 4, commands.BucketType.user)
@@ -245,6 +357,119 @@ class Alias(commands.Cog):
         view = ClearConfirmView(ctx.author, self, ctx.guild.id)
         view.message = await ctx.send(embed=embed, view=view)
 
+    @commands.group(name="macro", aliases=["macros"], invoke_without_command=True)
+    @commands.cooldown(1, 4, commands.BucketType.user)
+    @commands.has_permissions(manage_guild=True)
+    async def macro(self, ctx):
+        """Manage multi-step command macros"""
+        await ctx.send_help(ctx.command)
+
+    @macro.command(name="add", aliases=["create"])
+    @commands.has_permissions(manage_guild=True)
+    async def macro_add(self, ctx, name: str = None, *, steps: str = None):
+        """Add a macro that runs several commands
+
+        Steps are separated by `;`. Use `{1}`-`{9}` for single arguments and `{args}` for all of them.
+        Example: ;macro add lockdown lock; slowmode 10; say channel locked: {args}
+        """
+        if not name or not steps:
+            return await ctx.send_help(ctx.command)
+
+        name = name.lower()
+
+        if self.bot.get_command(name):
+            return await ctx.deny(f"**{name}** is already a command")
+
+        if self.resolve_alias(ctx.guild.id, name):
+            return await ctx.deny(f"**{name}** is already an alias")
+
+        if name in self.macros.get(ctx.guild.id, {}):
+            return await ctx.deny(f"Macro **{name}** already exists")
+
+        try:
+            plan = self.parse_macro(steps)
+            macro = self.load_macro(plan)
+        except ValueError as e:
+            return await ctx.warn(str(e))
+
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("""
+                    INSERT INTO command_macros (guild_id, macro_name, plan)
+                    VALUES (%s, %s, %s)
+                """, (ctx.guild.id, name, json.dumps(plan)))
+
+        if ctx.guild.id not in self.macros:
+            self.macros[ctx.guild.id] = {}
+        self.macros[ctx.guild.id][name] = macro
+
+        await ctx.approve(f"Added macro **{name}** with **{len(plan)}** steps")
+
+    @macro.command(name="remove", aliases=["delete", "del"])
+    @commands.has_permissions(manage_guild=True)
+    async def macro_remove(self, ctx, name: str = None):
+        """Remove a macro"""
+        if not name:
+            return await ctx.send_help(ctx.command)
+
+        name = name.lower()
+
+        if name not in self.macros.get(ctx.guild.id, {}):
+            return await ctx.warn(f"Macro **{name}** not found")
+
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("""
+                    DELETE FROM command_macros
+                    WHERE guild_id = %s AND macro_name = %s
+                """, (ctx.guild.id, name))
+
+        del self.macros[ctx.guild.id][name]
+
+        await ctx.approve(f"Removed macro **{name}**")
+
+    @macro.command(name="list", aliases=["all", "view"])
+    async def macro_list(self, ctx):
+        """View all macros with their average run time"""
+        macros = self.macros.get(ctx.guild.id)
+        if not macros:
+            return await ctx.warn("No macros configured")
+
+        lines = []
+        for name, macro in macros.items():
+            steps = "; ".join(f"{step['command']} {step['args']}".strip() for step in macro['plan'])
+            timing = f"{macro['total_ms'] / macro['runs']:.0f}ms avg over {macro['runs']} runs" if macro['runs'] else "never run"
+            lines.append(f"`{name}` → `{steps}`\n-# {timing}")
+
+        embed = discord.Embed(
+            description="\n".join(lines),
+            color=Config.COLORS.DEFAULT,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_author(name="Configured Macros", icon_url=self.bot.user.display_avatar.url)
+        embed.set_footer(text=f"{len(macros)} macros")
+
+        await ctx.send(embed=embed)
+
+    @macro.command(name="run")
+    @commands.cooldown(1, 4, commands.BucketType.user)
+    async def macro_run(self, ctx, name: str = None, *, args: str = ""):
+        """Run a macro"""
+        # A macro invoked by its own name comes straight here, past the macro group's checks
+        try:
+            if not await self.macro.can_run(ctx):
+                raise commands.CheckFailure(f"The check functions for command {self.macro.qualified_name} failed.")
+        except commands.CommandError as e:
+            return self.bot.dispatch("command_error", ctx, e)
+        if not name:
+            return await ctx.send_help(ctx.command)
+
+        macro = self.macros.get(ctx.guild.id, {}).get(name.lower())
+        if not macro:
+            return await ctx.warn(f"Macro **{name}** not found")
+
+        await self.run_macro(ctx, macro, args)
+
 
 async def setup(bot):
     await bot.add_cog(Alias(bot))
@@ -1,5 +1,8 @@
 import discord
+import aiomysql
 import asyncio
+import heapq
+import math
 import random
 from discord.ext import commands, tasks
 from src.config import Config
@@ -31,19 +34,101 @@ def parse_time(time_str: str) -> Optional[int]:
     return total_seconds if total_seconds > 0 else None
 
 
+class WeightedReservoir:
+    """Weighted sampling without replacement over a stream (Efraimidis-Spirakis A-Res)
+    
+    Every item gets the key log(u) / weight and the k largest keys win, so only
+    k items are held no matter how many entrants are streamed through it.
+    """
+    
+    def __init__(self, k: int):
+        self.k = k
+        self.heap = []  # min-heap of (key, item)
+    
+    def add(self, item, weight: float):
+        key = math.log(1.0 - random.random()) / weight
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (key, item))
+        elif self.heap and key > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (key, item))
+    
+    def winners(self) -> list:
+        return [item for _, item in sorted(self.heap, reverse=True)]
+
+
+def as_utc(dt: datetime) -> datetime:
+    """DATETIME columns come back naive; treat them as UTC"""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+class GiveawayButton(discord.ui.DynamicItem[discord.ui.Button], template=r"giveaway:(?P<action>enter|view):(?P<id>[0-9]+)"):
+    """Persistent giveaway button that carries its giveaway id in the custom id"""
+    
+    def __init__(self, action: str, giveaway_id: int):
+        if action == "enter":
+            button = discord.ui.Button(
+                emoji="🎉",
+                style=discord.ButtonStyle.primary,
+                custom_id=f"giveaway:enter:{giveaway_id}"
+            )
+        else:
+            button = discord.ui.Button(
+                label="View Participants",
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"giveaway:view:{giveaway_id}"
+            )
+        super().__init__(button)
+        self.action = action
+        self.giveaway_id = giveaway_id
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], int(match["id"]))
+    
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Giveaway")
+        if not cog:
+            return
+        if self.action == "enter":
+            await cog.handle_entry(interaction, self.giveaway_id)
+        else:
+            await cog.view_participants(interaction, self.giveaway_id)
+
+
+class LegacyGiveawayButton(discord.ui.DynamicItem[discord.ui.Button], template=r"giveaway_(?P<action>enter|view)"):
+    """Buttons posted before ids were encoded; the giveaway is found by its message"""
+    
+    def __init__(self, action: str):
+        super().__init__(discord.ui.Button(custom_id=f"giveaway_{action}"))
+        self.action = action
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"])
+    
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Giveaway")
+        if not cog:
+            return
+        giveaway_id = next(
+            (gid for gid, data in cog.cache.items() if data['message_id'] == interaction.message.id),
+            None
+        )
+        if giveaway_id is None:
+            return await interaction.response.send_message("This giveaway has ended!", ephemeral=True)
+        if self.action == "enter":
+            await cog.handle_entry(interaction, giveaway_id)
+        else:
+            await cog.view_participants(interaction, giveaway_id)
+
+
 class GiveawayView(discord.ui.View):
     def __init__(self, giveaway_id: int, cog):
         super().__init__(timeout=None)
         self.giveaway_id = giveaway_id
         self.cog = cog
-    
-    @discord.ui.button(emoji="🎉", style=discord.ButtonStyle.primary, custom_id="giveaway_enter")
-    async def enter_giveaway(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.handle_entry(interaction, self.giveaway_id)
-    
-    @discord.ui.button(label="View Participants", style=discord.ButtonStyle.secondary, custom_id="giveaway_view")
-    async def view_participants(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.view_participants(interaction, self.giveaway_id)
+        self.add_item(GiveawayButton("enter", giveaway_id))
+        self.add_item(GiveawayButton("view", giveaway_id))
 
 
 class Giveaway(commands.Cog):
@@ -54,6 +139,18 @@ class Giveaway(commands.Cog):
         self.cache = {}  # giveaway_id -> giveaway data
         self.blacklist_cache = {}  # guild_id -> set of role_ids
         self.max_entries_cache = {}  # guild_id -> {role_id: max_entries}
+        self.bonus_cache = {}  # guild_id -> {role_id: bonus entries}
+        self.required_cache = {}  # guild_id -> set of role_ids an entrant must hold
+        self.deadlines = []  # heap of (ends_at, giveaway_id)
+        self.wakeup = asyncio.Event()
+        self.scheduler_task = None
+        self.entrants = {}  # giveaway_id -> set of user_ids, active giveaways only
+        self.pending_entries = {}  # (giveaway_id, user_id) -> True to insert, False to delete
+        self.dirty_giveaways = set()  # giveaway_ids whose entry count needs refreshing
+        self.entry_counts = {}  # guild_id -> {user_id: entries in active giveaways}
+        self.flush_lock = asyncio.Lock()
+        # One registration routes every giveaway button, past and future
+        bot.add_dynamic_items(GiveawayButton, LegacyGiveawayButton)
         bot.loop.create_task(self.setup_tables())
     
     async def setup_tables(self):
@@ -111,9 +208,31 @@ class Giveaway(commands.Cog):
                         UNIQUE KEY unique_max (guild_id, role_id)
                     )
                 """)
+                
+                # Bonus entries per role
+                await cur.execute("""
+                    CREATE TABLE IF NOT EXISTS giveaway_bonus_entries (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        guild_id BIGINT NOT NULL,
+                        role_id BIGINT NOT NULL,
+                        entries INT NOT NULL,
+                        UNIQUE KEY unique_bonus (guild_id, role_id)
+                    )
+                """)
+                
+                # Roles required to enter
+                await cur.execute("""
+                    CREATE TABLE IF NOT EXISTS giveaway_required_roles (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        guild_id BIGINT NOT NULL,
+                        role_id BIGINT NOT NULL,
+                        UNIQUE KEY unique_required (guild_id, role_id)
+                    )
+                """)
 
         await self.load_cache()
-        self.check_giveaways.start()
+        self.scheduler_task = self.bot.loop.create_task(self.run_scheduler())
+        self.flush_loop.start()
     
     async def load_cache(self):
         """Load active giveaways and settings into cache"""
@@ -136,8 +255,21 @@ class Giveaway(commands.Cog):
                         'host_id': row[4],
                         'prize': row[5],
                         'winners': row[6],
-                        'ends_at': row[7]
+                        'ends_at': as_utc(row[7])
                     }
+                    heapq.heappush(self.deadlines, (self.cache[row[0]]['ends_at'], row[0]))
+                    self.entrants[row[0]] = set()
+                
+                # Load entrants of active giveaways
+                await cur.execute("""
+                    SELECT ge.giveaway_id, ge.user_id FROM giveaway_entries ge
+                    JOIN giveaways g ON ge.giveaway_id = g.id
+                    WHERE g.ended = FALSE
+                """)
+                rows = await cur.fetchall()
+                for giveaway_id, user_id in rows:
+                    self.entrants.setdefault(giveaway_id, set()).add(user_id)
+                    self.bump_entry_count(self.cache[giveaway_id]['guild_id'], user_id, 1)
                 
                 # Load blacklisted roles
                 await cur.execute("SELECT guild_id, role_id FROM giveaway_blacklist")
@@ -154,103 +286,175 @@ class Giveaway(commands.Cog):
                     if guild_id not in self.max_entries_cache:
                         self.max_entries_cache[guild_id] = {}
                     self.max_entries_cache[guild_id][role_id] = max_entries
+                
+                # Load bonus entries
+                await cur.execute("SELECT guild_id, role_id, entries FROM giveaway_bonus_entries")
+                rows = await cur.fetchall()
+                for guild_id, role_id, entries in rows:
+                    if guild_id not in self.bonus_cache:
+                        self.bonus_cache[guild_id] = {}
+                    self.bonus_cache[guild_id][role_id] = entries
+                
+                # Load required roles
+                await cur.execute("SELECT guild_id, role_id FROM giveaway_required_roles")
+                rows = await cur.fetchall()
+                for guild_id, role_id in rows:
+                    if guild_id not in self.required_cache:
+                        self.required_cache[guild_id] = set()
+                    self.required_cache[guild_id].add(role_id)
     
-    def cog_unload(self):
-        self.check_giveaways.cancel()
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(GiveawayButton, LegacyGiveawayButton)
+        if self.scheduler_task:
+            self.scheduler_task.cancel()
+        self.flush_loop.cancel()
+        await self.flush_entries()
     
-    @tasks.loop(seconds=15)
-    async def check_giveaways(self):
-        """Check for ended giveaways"""
-        now = datetime.now(timezone.utc)
-        ended_ids = []
-        
-        for giveaway_id, data in list(self.cache.items()):
-            ends_at = data['ends_at']
-            if isinstance(ends_at, datetime):
-                if ends_at.tzinfo is None:
-                    ends_at = ends_at.replace(tzinfo=timezone.utc)
+    def schedule(self, giveaway_id: int, ends_at: datetime):
+        """Add a giveaway deadline and wake the scheduler if it is now the earliest"""
+        heapq.heappush(self.deadlines, (ends_at, giveaway_id))
+        self.wakeup.set()
+    
+    async def run_scheduler(self):
+        """Sleep until the next giveaway deadline and end everything that is due"""
+        while True:
+            now = datetime.now(timezone.utc)
+            due = []
+            while self.deadlines and self.deadlines[0][0] <= now:
+                ends_at, giveaway_id = heapq.heappop(self.deadlines)
+                # Entries for giveaways that were ended early or rescheduled are skipped lazily
+                data = self.cache.get(giveaway_id)
+                if data and data['ends_at'] == ends_at:
+                    due.append(giveaway_id)
             
-            if now >= ends_at:
-                ended_ids.append(giveaway_id)
-        
-        for giveaway_id in ended_ids:
-            await self.end_giveaway_internal(giveaway_id)
+            if due:
+                await asyncio.gather(*(self.end_giveaway_internal(gid) for gid in due), return_exceptions=True)
+                continue
+            
+            self.wakeup.clear()
+            timeout = (self.deadlines[0][0] - now).total_seconds() if self.deadlines else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
     
-    @check_giveaways.before_loop
-    async def before_check(self):
-        await self.bot.wait_until_ready()
+    def bump_entry_count(self, guild_id: int, user_id: int, delta: int):
+        """Adjust a user's active-entry counter for a guild"""
+        counts = self.entry_counts.setdefault(guild_id, {})
+        count = counts.get(user_id, 0) + delta
+        if count > 0:
+            counts[user_id] = count
+        else:
+            counts.pop(user_id, None)
+    
+    @tasks.loop(seconds=5)
+    async def flush_loop(self):
+        """Write buffered entries and refresh entry counts at most once per tick"""
+        await self.flush_entries()
+        dirty, self.dirty_giveaways = self.dirty_giveaways, set()
+        await asyncio.gather(*(self.update_giveaway_message(gid) for gid in dirty), return_exceptions=True)
+    
+    async def flush_entries(self):
+        """Write buffered entry changes to the database in batches"""
+        async with self.flush_lock:
+            if not self.pending_entries or not self.bot.db_pool:
+                return
+            
+            pending, self.pending_entries = self.pending_entries, {}
+            adds = [key for key, entered in pending.items() if entered]
+            removes = [key for key, entered in pending.items() if not entered]
+            try:
+                async with self.bot.db_pool.acquire() as conn:
+                    async with conn.cursor() as cur:
+                        if adds:
+                            await cur.executemany(
+                                "INSERT IGNORE INTO giveaway_entries (giveaway_id, user_id) VALUES (%s, %s)",
+                                adds
+                            )
+                        if removes:
+                            await cur.executemany(
+                                "DELETE FROM giveaway_entries WHERE giveaway_id = %s AND user_id = %s",
+                                removes
+                            )
+            except Exception as e:
+                print(f"Error flushing giveaway entries: {e}")
+                # Keep the batch for the next flush unless a newer click superseded it
+                for key, entered in pending.items():
+                    self.pending_entries.setdefault(key, entered)
     
     async def handle_entry(self, interaction: discord.Interaction, giveaway_id: int):
-        """Handle a user entering a giveaway"""
+        """Handle a user entering or leaving a giveaway"""
         if giveaway_id not in self.cache:
             return await interaction.response.send_message("This giveaway has ended!", ephemeral=True)
         
         guild_id = interaction.guild_id
         user = interaction.user
+        entrants = self.entrants.setdefault(giveaway_id, set())
+        
+        if user.id in entrants:
+            entrants.discard(user.id)
+            self.bump_entry_count(guild_id, user.id, -1)
+            self.pending_entries[(giveaway_id, user.id)] = False
+            self.dirty_giveaways.add(giveaway_id)
+            return await interaction.response.send_message("You've left the giveaway.", ephemeral=True)
+        
+        user_role_ids = {r.id for r in user.roles}
         
         # Check blacklist
         if guild_id in self.blacklist_cache:
-            user_role_ids = {r.id for r in user.roles}
             if user_role_ids & self.blacklist_cache[guild_id]:
                 return await interaction.response.send_message(
                     "You have a blacklisted role and cannot enter this giveaway!", 
                     ephemeral=True
                 )
         
+        # Check required roles
+        missing = self.required_cache.get(guild_id, set()) - user_role_ids
+        if missing:
+            roles = ", ".join(f"<@&{role_id}>" for role_id in missing)
+            return await interaction.response.send_message(
+                f"You need {roles} to enter this giveaway!",
+                ephemeral=True
+            )
+        
         # Check max entries for roles
         if guild_id in self.max_entries_cache:
-            for role_id, max_entries in self.max_entries_cache[guild_id].items():
-                role = interaction.guild.get_role(role_id)
-                if role and role in user.roles:
-                    # Count user's current entries
-                    async with self.bot.db_pool.acquire() as conn:
-                        async with conn.cursor() as cur:
-                            await cur.execute("""
-                                SELECT COUNT(*) FROM giveaway_entries ge
-                                JOIN giveaways g ON ge.giveaway_id = g.id
-                                WHERE ge.user_id = %s AND g.guild_id = %s AND g.ended = FALSE
-                            """, (user.id, guild_id))
-                            result = await cur.fetchone()
-                            if result[0] >= max_entries:
-                                return await interaction.response.send_message(
-                                    f"You've reached the max entries ({max_entries}) for your role!",
-                                    ephemeral=True
-                                )
-        
-        # Try to add entry
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                try:
-                    await cur.execute(
-                        "INSERT INTO giveaway_entries (giveaway_id, user_id) VALUES (%s, %s)",
-                        (giveaway_id, user.id)
-                    )
-                    await interaction.response.send_message("You've entered the giveaway! 🎉", ephemeral=True)
-                    await self.update_giveaway_message(giveaway_id)
-                except Exception:
-                    # Already entered, remove entry
-                    await cur.execute(
-                        "DELETE FROM giveaway_entries WHERE giveaway_id = %s AND user_id = %s",
-                        (giveaway_id, user.id)
+            limits = [
+                max_entries for role_id, max_entries in self.max_entries_cache[guild_id].items()
+                if role_id in user_role_ids
+            ]
+            if limits:
+                max_entries = min(limits)
+                if self.entry_counts.get(guild_id, {}).get(user.id, 0) >= max_entries:
+                    return await interaction.response.send_message(
+                        f"You've reached the max entries ({max_entries}) for your role!",
+                        ephemeral=True
                     )
-                    await interaction.response.send_message("You've left the giveaway.", ephemeral=True)
-                    await self.update_giveaway_message(giveaway_id)
+        
+        entrants.add(user.id)
+        self.bump_entry_count(guild_id, user.id, 1)
+        self.pending_entries[(giveaway_id, user.id)] = True
+        self.dirty_giveaways.add(giveaway_id)
+        await interaction.response.send_message("You've entered the giveaway! 🎉", ephemeral=True)
     
     async def view_participants(self, interaction: discord.Interaction, giveaway_id: int):
         """View giveaway participants"""
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    "SELECT user_id FROM giveaway_entries WHERE giveaway_id = %s",
-                    (giveaway_id,)
-                )
-                rows = await cur.fetchall()
+        if giveaway_id in self.entrants:
+            user_ids = list(self.entrants[giveaway_id])
+        else:
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "SELECT user_id FROM giveaway_entries WHERE giveaway_id = %s",
+                        (giveaway_id,)
+                    )
+                    user_ids = [row[0] for row in await cur.fetchall()]
         
-        if not rows:
+        if not user_ids:
             return await interaction.response.send_message("No participants yet!", ephemeral=True)
         
-        participants = [f"<@{row[0]}>" for row in rows[:20]]
-        extra = len(rows) - 20 if len(rows) > 20 else 0
+        participants = [f"<@{user_id}>" for user_id in user_ids[:20]]
+        extra = len(user_ids) - 20 if len(user_ids) > 20 else 0
         
         desc = "\n".join(participants)
         if extra > 0:
@@ -261,7 +465,7 @@ class Giveaway(commands.Cog):
             description=desc,
             color=Config.COLORS.DEFAULT
         )
-        embed.set_footer(text=f"Total: {len(rows)} entries")
+        embed.set_footer(text=f"Total: {len(user_ids)} entries")
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
     async def update_giveaway_message(self, giveaway_id: int):
@@ -276,20 +480,8 @@ class Giveaway(commands.Cog):
             if not channel:
                 return
             
-            message = await channel.fetch_message(data['message_id'])
-            
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cur:
-                    await cur.execute(
-                        "SELECT COUNT(*) FROM giveaway_entries WHERE giveaway_id = %s",
-                        (giveaway_id,)
-                    )
-                    result = await cur.fetchone()
-                    entry_count = result[0]
-            
+            entry_count = len(self.entrants.get(giveaway_id, ()))
             ends_at = data['ends_at']
-            if isinstance(ends_at, datetime) and ends_at.tzinfo is None:
-                ends_at = ends_at.replace(tzinfo=timezone.utc)
             
             embed = discord.Embed(
                 title=data['prize'],
@@ -306,7 +498,7 @@ class Giveaway(commands.Cog):
             host = self.bot.get_user(data['host_id'])
             embed.set_footer(text=f"hosted by {host.name if host else 'Unknown'}")
             
-            await message.edit(embed=embed)
+            await channel.get_partial_message(data['message_id']).edit(embed=embed)
         except Exception:
             pass
     
@@ -316,15 +508,16 @@ class Giveaway(commands.Cog):
             return
         
         data = self.cache.pop(giveaway_id)
+        for user_id in self.entrants.pop(giveaway_id, ()):
+            self.bump_entry_count(data['guild_id'], user_id, -1)
+        self.dirty_giveaways.discard(giveaway_id)
+        await self.flush_entries()
         
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("UPDATE giveaways SET ended = TRUE WHERE id = %s", (giveaway_id,))
-                await cur.execute(
-                    "SELECT user_id FROM giveaway_entries WHERE giveaway_id = %s",
-                    (giveaway_id,)
-                )
-                entries = await cur.fetchall()
+        
+        winner_ids, entry_count = await self.draw_winners(giveaway_id, data['guild_id'], data['winners'])
         
         try:
             channel = self.bot.get_channel(data['channel_id'])
@@ -333,7 +526,7 @@ class Giveaway(commands.Cog):
             
             message = await channel.fetch_message(data['message_id'])
             
-            if not entries:
+            if not winner_ids:
                 embed = discord.Embed(
                     title=data['prize'],
                     description="No valid entries - no winners!",
@@ -343,10 +536,6 @@ class Giveaway(commands.Cog):
                 await message.edit(embed=embed, view=None)
                 return
             
-            user_ids = [e[0] for e in entries]
-            winner_count = min(data['winners'], len(user_ids))
-            winner_ids = random.sample(user_ids, winner_count)
-            
             winners_mention = ", ".join([f"<@{uid}>" for uid in winner_ids])
             
             embed = discord.Embed(
@@ -354,7 +543,7 @@ class Giveaway(commands.Cog):
                 description=f"**Winners:** {winners_mention}",
                 color=Config.COLORS.SUCCESS
             )
-            embed.add_field(name="Entries", value=str(len(entries)), inline=True)
+            embed.add_field(name="Entries", value=str(entry_count), inline=True)
             embed.set_footer(text="Giveaway ended")
             
             await message.edit(embed=embed, view=None)
@@ -362,6 +551,47 @@ class Giveaway(commands.Cog):
         except Exception:
             pass
     
+    def entry_weight(self, guild: Optional[discord.Guild], user_id: int) -> int:
+        """Number of tickets a user holds: 0 if ineligible, 1 plus role bonuses otherwise"""
+        required = self.required_cache.get(guild.id) if guild else None
+        bonuses = self.bonus_cache.get(guild.id) if guild else None
+        if not required and not bonuses:
+            return 1
+        
+        member = guild.get_member(user_id)
+        if not member:
+            return 0 if required else 1
+        if required and any(member.get_role(role_id) is None for role_id in required):
+            return 0
+        return 1 + sum(entries for role_id, entries in (bonuses or {}).items() if member.get_role(role_id))
+    
+    async def draw_winners(self, giveaway_id: int, guild_id: int, winner_count: int):
+        """Stream a giveaway's entrants from the database and draw weighted winners
+        
+        Returns (winner_ids, entry_count).
+        """
+        guild = self.bot.get_guild(guild_id)
+        reservoir = WeightedReservoir(winner_count)
+        entry_count = 0
+        
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSCursor) as cur:
+                await cur.execute(
+                    "SELECT user_id FROM giveaway_entries WHERE giveaway_id = %s",
+                    (giveaway_id,)
+                )
+                while True:
+                    rows = await cur.fetchmany(1000)
+                    if not rows:
+                        break
+                    for (user_id,) in rows:
+                        entry_count += 1
+                        weight = self.entry_weight(guild, user_id)
+                        if weight > 0:
+                            reservoir.add(user_id, weight)
+        
+        return reservoir.winners(), entry_count
+    
     async def reroll_giveaway_internal(self, giveaway_id: int, winner_count: int = 1):
         """Reroll winners for an ended giveaway"""
         async with self.bot.db_pool.acquire() as conn:
@@ -371,22 +601,12 @@ class Giveaway(commands.Cog):
                     (giveaway_id,)
                 )
                 giveaway = await cur.fetchone()
-                
-                if not giveaway:
-                    return None
-                
-                await cur.execute(
-                    "SELECT user_id FROM giveaway_entries WHERE giveaway_id = %s",
-                    (giveaway_id,)
-                )
-                entries = await cur.fetchall()
         
-        if not entries:
-            return []
+        if not giveaway:
+            return None
         
-        user_ids = [e[0] for e in entries]
-        winner_count = min(winner_count, len(user_ids))
-        return random.sample(user_ids, winner_count), giveaway[3]
+        winner_ids, _ = await self.draw_winners(giveaway_id, giveaway[0], winner_count)
+        return winner_ids, giveaway[3]
 
     @commands.group(name="giveaway", aliases=["gw", "g"], invoke_without_command=True)
     @commands.cooldown(1, 4, commands.BucketType.user)
@@ -449,6 +669,9 @@ class Giveaway(commands.Cog):
             'winners': winners,
             'ends_at': ends_at
         }
+        self.entrants[giveaway_id] = set()
+        
+        self.schedule(giveaway_id, ends_at)
         
         # Update message with view
         view = GiveawayView(giveaway_id, self)
@@ -635,6 +858,128 @@ class Giveaway(commands.Cog):
                     self.max_entries_cache[ctx.guild.id][role.id] = max_entries
                     
                     await ctx.approve(f"Set max entries for {role.mention} to **{max_entries}**")
+    
+    @giveaway.command(name="bonus", aliases=["weight", "extra"])
+    @commands.has_permissions(manage_guild=True)
+    async def giveaway_bonus(self, ctx, role: discord.Role = None, entries: int = None):
+        """Give users with a role bonus entries in every giveaway
+        
+        Example: ;giveaway bonus @Booster 2
+        Example: ;giveaway bonus @Booster 0 (removes bonus)
+        """
+        if not role:
+            # Show current bonuses
+            if ctx.guild.id not in self.bonus_cache or not self.bonus_cache[ctx.guild.id]:
+                return await ctx.warn("No bonus entries configured")
+            
+            lines = []
+            for role_id, bonus in self.bonus_cache[ctx.guild.id].items():
+                r = ctx.guild.get_role(role_id)
+                if r:
+                    lines.append(f"{r.mention}: **+{bonus}** entries")
+            
+            embed = discord.Embed(
+                title="Bonus Entries",
+                description="\n".join(lines) if lines else "None",
+                color=Config.COLORS.DEFAULT
+            )
+            return await ctx.send(embed=embed)
+        
+        if entries is None:
+            return await ctx.send_help(ctx.command)
+        
+        if entries < 0 or entries > 100:
+            return await ctx.deny("Bonus entries must be between 0 and 100")
+        
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                if entries == 0:
+                    await cur.execute(
+                        "DELETE FROM giveaway_bonus_entries WHERE guild_id = %s AND role_id = %s",
+                        (ctx.guild.id, role.id)
+                    )
+                    if ctx.guild.id in self.bonus_cache:
+                        self.bonus_cache[ctx.guild.id].pop(role.id, None)
+                    await ctx.approve(f"Removed bonus entries for {role.mention}")
+                else:
+                    await cur.execute("""
+                        INSERT INTO giveaway_bonus_entries (guild_id, role_id, entries)
+                        VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE entries = %s
+                    """, (ctx.guild.id, role.id, entries, entries))
+                    
+                    if ctx.guild.id not in self.bonus_cache:
+                        self.bonus_cache[ctx.guild.id] = {}
+                    self.bonus_cache[ctx.guild.id][role.id] = entries
+                    
+                    await ctx.approve(f"{role.mention} now gets **+{entries}** bonus entries")
+    
+    @giveaway.command(name="require", aliases=["required", "req"])
+    @commands.has_permissions(manage_guild=True)
+    async def giveaway_require(self, ctx, action: str = None, role: discord.Role = None):
+        """Require a role to enter giveaways
+        
+        Example: ;giveaway require add @Verified
+        Example: ;giveaway require remove @Verified
+        Example: ;giveaway require list
+        """
+        if not action:
+            return await ctx.send_help(ctx.command)
+        
+        action = action.lower()
+        
+        if action == "list":
+            if ctx.guild.id not in self.required_cache or not self.required_cache[ctx.guild.id]:
+                return await ctx.warn("No required roles")
+            
+            roles = []
+            for role_id in self.required_cache[ctx.guild.id]:
+                r = ctx.guild.get_role(role_id)
+                if r:
+                    roles.append(r.mention)
+            
+            embed = discord.Embed(
+                title="Required Roles",
+                description="\n".join(roles) if roles else "None",
+                color=Config.COLORS.DEFAULT
+            )
+            return await ctx.send(embed=embed)
+        
+        if not role:
+            return await ctx.deny("Please specify a role")
+        
+        if action in ["add", "+"]:
+            if ctx.guild.id in self.required_cache and role.id in self.required_cache[ctx.guild.id]:
+                return await ctx.deny(f"{role.mention} is already required")
+            
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "INSERT INTO giveaway_required_roles (guild_id, role_id) VALUES (%s, %s)",
+                        (ctx.guild.id, role.id)
+                    )
+            
+            if ctx.guild.id not in self.required_cache:
+                self.required_cache[ctx.guild.id] = set()
+            self.required_cache[ctx.guild.id].add(role.id)
+            
+            await ctx.approve(f"{role.mention} is now required to enter giveaways")
+        
+        elif action in ["remove", "-", "del", "delete"]:
+            if ctx.guild.id not in self.required_cache or role.id not in self.required_cache[ctx.guild.id]:
+                return await ctx.deny(f"{role.mention} is not required")
+            
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "DELETE FROM giveaway_required_roles WHERE guild_id = %s AND role_id = %s",
+                        (ctx.guild.id, role.id)
+                    )
+            
+            self.required_cache[ctx.guild.id].discard(role.id)
+            await ctx.approve(f"{role.mention} is no longer required")
+        else:
+            return await ctx.deny("Invalid action. Use `add`, `remove`, or `list`")
 
 
 async def setup(bot):
@@ -1,8 +1,119 @@
 import discord
 import json
+import re
+import time
 import asyncio
+from collections import Counter, OrderedDict
 from discord.ext import commands
 from src.config import Config
+from src.tools.ahocorasick import Automaton
+from src.tools.ratelimit import TokenBuckets
+from src.tools.template import Template, TemplateError
+
+
+MATCH_MODES = {
+	"exact": "exact",
+	"contains": "contains",
+	"word": "word",
+	"starts": "starts",
+	"startswith": "starts",
+	"starts-with": "starts",
+}
+MODE_FLAG = re.compile(r"\s*--mode\s+(\S+)")
+
+# (rate, per seconds) token buckets; the trigger bucket is per trigger per channel
+DEFAULT_TRIGGER_COOLDOWN = (1, 3.0)
+DEFAULT_LIMITS = {"user": (3, 10.0), "guild": (10, 10.0)}
+
+# Guilds whose triggers stay in memory; the least recently active are evicted past this
+MAX_CACHED_GUILDS = 5000
+# Seconds a guild whose autoresponses failed to load is skipped before trying again
+LOAD_RETRY = 30.0
+
+
+def _entry(value) -> dict:
+	"""Older entries are stored as a bare response string and match exactly"""
+	if isinstance(value, str):
+		return {"response": value, "mode": "exact"}
+	return value
+
+
+def _is_word_char(char: str) -> bool:
+	return char.isalnum() or char == "_"
+
+
+class TriggerMatcher:
+	"""A guild's triggers compiled once: a dict for exact triggers, one automaton for the rest."""
+
+	def __init__(self, guild_map: dict):
+		self.exact = set()
+		self.modes = []
+		patterns = []
+		for trigger, value in guild_map.items():
+			mode = _entry(value)["mode"]
+			if mode == "exact":
+				self.exact.add(trigger)
+			else:
+				patterns.append(trigger)
+				self.modes.append(mode)
+		self.automaton = Automaton(patterns)
+
+	def match(self, content: str):
+		"""Return the first trigger that matches the lowercased message, or None"""
+		if content in self.exact:
+			return content
+		if not self.automaton:
+			return None
+
+		for end, index in self.automaton.iter(content):
+			trigger = self.automaton.patterns[index]
+			mode = self.modes[index]
+			start = end - len(trigger) + 1
+			if mode == "contains":
+				return trigger
+			if mode == "starts":
+				if start == 0:
+					return trigger
+			elif mode == "word":
+				if (start == 0 or not _is_word_char(content[start - 1])) and (
+					end == len(content) - 1 or not _is_word_char(content[end + 1])
+				):
+					return trigger
+		return None
+
+
+class GuildResponses:
+	"""One guild's triggers and limits, plus the matcher and templates compiled from them."""
+
+	__slots__ = ("triggers", "limits", "suppressed", "matcher", "templates")
+
+	def __init__(self, triggers: dict, limits: dict):
+		self.triggers = triggers  # trigger -> {"response", "mode", optional "cooldown": (rate, per)}
+		self.limits = limits  # scope -> (rate, per)
+		self.suppressed = Counter()  # suppressed replies by scope
+		self.matcher = None
+		self.templates = {}
+
+	def changed(self):
+		"""Drop compiled state after triggers were added or removed"""
+		self.matcher = None
+		self.templates = {k: v for k, v in self.templates.items() if k in self.triggers}
+
+	def match(self, content: str):
+		if self.matcher is None:
+			self.matcher = TriggerMatcher(self.triggers)
+		return self.matcher.match(content)
+
+	def template(self, trigger: str) -> Template:
+		template = self.templates.get(trigger)
+		if template is None:
+			response = self.triggers[trigger]["response"]
+			try:
+				template = Template(response)
+			except TemplateError:
+				template = Template.literal(response)
+			self.templates[trigger] = template
+		return template
 
 
 class AutoResponder(commands.Cog):
@@ -11,57 +122,184 @@ class AutoResponder(commands.Cog):
 	def __init__(self, bot):
 		self.bot = bot
 		self.path = "src/autoresponses.json"
-		self.data: dict = {}
-		bot.loop.create_task(self._load())
+		self.limits_path = "src/autoresponder_limits.json"
+		self.guilds = OrderedDict()  # guild_id -> GuildResponses, least recently used first
+		self.loading: dict = {}  # guild_id -> Task loading that guild
+		self.failed: dict = {}  # guild_id -> monotonic time the next load may be tried
+		self.buckets = TokenBuckets(max_keys=50000)
+		bot.loop.create_task(self._setup())
 
-	async def _load(self):
+	async def _setup(self):
 		await self.bot.wait_until_ready()
+		if not self.bot.db_pool:
+			return
+
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				await cur.execute("""
+					CREATE TABLE IF NOT EXISTS autoresponses (
+						id INT AUTO_INCREMENT PRIMARY KEY,
+						guild_id BIGINT NOT NULL,
+						trigger_text VARCHAR(255) NOT NULL,
+						response TEXT NOT NULL,
+						match_mode VARCHAR(16) NOT NULL DEFAULT 'exact',
+						cooldown_rate INT NULL,
+						cooldown_per DOUBLE NULL,
+						UNIQUE KEY unique_trigger (guild_id, trigger_text)
+					)
+				""")
+				await cur.execute("""
+					CREATE TABLE IF NOT EXISTS autoresponder_limits (
+						guild_id BIGINT NOT NULL,
+						scope VARCHAR(16) NOT NULL,
+						rate INT NOT NULL,
+						per DOUBLE NOT NULL,
+						PRIMARY KEY (guild_id, scope)
+					)
+				""")
+
+		await self._import_json()
+
+	async def _import_json(self):
+		"""One-time move of the JSON autoresponses and limits into their tables"""
 		loop = asyncio.get_event_loop()
 
-		def _read():
+		def _read(path):
 			try:
-				with open(self.path, "r", encoding="utf-8") as f:
+				with open(path, "r", encoding="utf-8") as f:
 					return json.load(f)
 			except FileNotFoundError:
 				return {}
 			except Exception:
 				return {}
 
-		self.data = await loop.run_in_executor(None, _read)
+		def _clear(path):
+			with open(path, "w", encoding="utf-8") as f:
+				json.dump({}, f)
 
-	async def _save(self):
-		loop = asyncio.get_event_loop()
+		data = await loop.run_in_executor(None, _read, self.path)
+		rows = []
+		for guild_id, guild_map in data.items():
+			for trigger, value in guild_map.items():
+				entry = _entry(value)
+				rate, per = entry.get("cooldown") or (None, None)
+				rows.append((int(guild_id), trigger, entry["response"], entry["mode"], rate, per))
 
-		def _write(d):
-			with open(self.path, "w", encoding="utf-8") as f:
-				json.dump(d, f, ensure_ascii=False, indent=2)
+		limits = await loop.run_in_executor(None, _read, self.limits_path)
+		limit_rows = [
+			(int(guild_id), scope, rate, per)
+			for guild_id, scopes in limits.items()
+			for scope, (rate, per) in scopes.items()
+		]
+		if not rows and not limit_rows:
+			return
 
-		await loop.run_in_executor(None, _write, self.data)
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				if rows:
+					await cur.executemany("""
+						INSERT IGNORE INTO autoresponses (guild_id, trigger_text, response, match_mode, cooldown_rate, cooldown_per)
+						VALUES (%s, %s, %s, %s, %s, %s)
+					""", rows)
+				if limit_rows:
+					await cur.executemany("""
+						INSERT IGNORE INTO autoresponder_limits (guild_id, scope, rate, per)
+						VALUES (%s, %s, %s, %s)
+					""", limit_rows)
+		if rows:
+			await loop.run_in_executor(None, _clear, self.path)
+		if limit_rows:
+			await loop.run_in_executor(None, _clear, self.limits_path)
+		for guild_id in {row[0] for row in rows + limit_rows}:
+			self.guilds.pop(guild_id, None)
 
-	def _get_guild(self, guild_id: int) -> dict:
-		key = str(guild_id)
-		if key not in self.data:
-			self.data[key] = {}
-		return self.data[key]
+	async def _fetch(self, guild_id: int) -> GuildResponses:
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				await cur.execute(
+					"SELECT trigger_text, response, match_mode, cooldown_rate, cooldown_per FROM autoresponses WHERE guild_id = %s",
+					(guild_id,)
+				)
+				triggers = {}
+				for trigger, response, mode, rate, per in await cur.fetchall():
+					entry = {"response": response, "mode": mode}
+					if rate:
+						entry["cooldown"] = (rate, per)
+					triggers[trigger] = entry
+
+				await cur.execute("SELECT scope, rate, per FROM autoresponder_limits WHERE guild_id = %s", (guild_id,))
+				limits = {scope: (rate, per) for scope, rate, per in await cur.fetchall()}
+		return GuildResponses(triggers, limits)
+
+	async def _get_guild(self, guild_id: int) -> GuildResponses:
+		"""Return a guild's autoresponses, loading them on first use and evicting idle guilds"""
+		state = self.guilds.get(guild_id)
+		if state is not None:
+			self.guilds.move_to_end(guild_id)
+			return state
+
+		# Concurrent messages from a guild that isn't loaded share one query
+		task = self.loading.get(guild_id)
+		if task is None:
+			task = self.loading[guild_id] = asyncio.ensure_future(self._fetch(guild_id))
+		try:
+			state = await task
+		finally:
+			self.loading.pop(guild_id, None)
+
+		self.failed.pop(guild_id, None)
+		self.guilds[guild_id] = state
+		self.guilds.move_to_end(guild_id)
+		while len(self.guilds) > MAX_CACHED_GUILDS:
+			self.guilds.popitem(last=False)
+		return state
+
+	def _allow(self, message: discord.Message, trigger: str, state: GuildResponses) -> bool:
+		"""Take a token from the trigger/channel, user and guild buckets; count it if any is empty"""
+		guild_id = message.guild.id
+		trigger_rate, trigger_per = state.triggers[trigger].get("cooldown", DEFAULT_TRIGGER_COOLDOWN)
+		user_rate, user_per = state.limits.get("user", DEFAULT_LIMITS["user"])
+		guild_rate, guild_per = state.limits.get("guild", DEFAULT_LIMITS["guild"])
+
+		blocked = self.buckets.acquire([
+			(("trigger", guild_id, trigger, message.channel.id), trigger_rate, trigger_per),
+			(("user", guild_id, message.author.id), user_rate, user_per),
+			(("guild", guild_id), guild_rate, guild_per),
+		])
+		if blocked is None:
+			return True
+		state.suppressed[blocked[0]] += 1
+		return False
 
 	@commands.Cog.listener()
 	async def on_message(self, message: discord.Message):
-		if message.author.bot or not message.guild:
-			return
-
-		guild_map = self._get_guild(message.guild.id)
-		if not guild_map:
+		if message.author.bot or not message.guild or not self.bot.db_pool:
 			return
 
 		content = message.content.strip().lower()
 		if not content:
 			return
 
-		response = guild_map.get(content)
-		if response:
+		guild_id = message.guild.id
+		if time.monotonic() < self.failed.get(guild_id, 0):
+			return
+		try:
+			state = await self._get_guild(guild_id)
+		except Exception as e:
+			# Messages that were waiting on the same load all land here; only the first logs it
+			if time.monotonic() >= self.failed.get(guild_id, 0):
+				print(f"Error loading autoresponses for {guild_id}: {e}")
+				self.failed[guild_id] = time.monotonic() + LOAD_RETRY
+			return
+		if not state.triggers:
+			return
+
+		trigger = state.match(content)
+		if trigger:
+			if not self._allow(message, trigger, state):
+				return
 			try:
-				resp = response.replace("{author}", message.author.mention)
-				await message.channel.send(resp)
+				await message.channel.send(**state.template(trigger).render(message))
 			except Exception:
 				pass
 
@@ -76,19 +314,51 @@ class AutoResponder(commands.Cog):
 	async def autoresponder_add(self, ctx, trigger: str = None, *, response: str = None):
 		"""Add an autoresponse. Use quotes for multi-word triggers and responses.
 
-		Example: ;autoresponder add "hello bot" "Hello {author}!"
+		Match modes: exact (default), contains, word, starts
+		Variables: {user} {user.name} {user.id} {user.avatar} {guild} {guild.id} {guild.icon}
+		{member_count} {channel} {channel.name} {mentions} {mention_count}
+		Conditionals: {if mentions}...{else}...{end}
+		Embeds: {title: ...} {description: ...} {color: #hex} {footer: ...} {image: url} {thumbnail: url} {author: ...} {url: ...}
+		Example: ;autoresponder add "hello bot" "Hello {user}!"
+		Example: ;autoresponder add gg "good game!" --mode word
+		Example: ;autoresponder add welcome {title: Hi {user.name}}{description: we have {member_count} members}
 		"""
 		if not trigger or not response:
 			return await ctx.send_help(ctx.command)
 
+		mode = "exact"
+		flag = MODE_FLAG.search(response)
+		if flag:
+			mode = MATCH_MODES.get(flag.group(1).lower())
+			if not mode:
+				return await ctx.deny("Invalid mode. Use `exact`, `contains`, `word` or `starts`")
+			response = MODE_FLAG.sub("", response).strip()
+			if not response:
+				return await ctx.send_help(ctx.command)
+
 		trigger_key = trigger.strip().lower()
-		guild_map = self._get_guild(ctx.guild.id)
+		if len(trigger_key) > 255:
+			return await ctx.deny("Triggers can be at most 255 characters")
 
-		if trigger_key in guild_map:
+		state = await self._get_guild(ctx.guild.id)
+		if trigger_key in state.triggers:
 			return await ctx.deny("That trigger already exists")
 
-		guild_map[trigger_key] = response
-		await self._save()
+		try:
+			template = Template(response)
+		except TemplateError as e:
+			return await ctx.deny(f"Invalid response: {e}")
+
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				await cur.execute(
+					"INSERT INTO autoresponses (guild_id, trigger_text, response, match_mode) VALUES (%s, %s, %s, %s)",
+					(ctx.guild.id, trigger_key, response, mode)
+				)
+
+		state.triggers[trigger_key] = {"response": response, "mode": mode}
+		state.changed()
+		state.templates[trigger_key] = template
 		await ctx.approve(f"Added autoresponse for **{trigger}**")
 
 	@autoresponder.command(name="remove", aliases=["delete", "del"])
@@ -99,37 +369,137 @@ class AutoResponder(commands.Cog):
 			return await ctx.send_help(ctx.command)
 
 		trigger_key = trigger.strip().lower()
-		guild_map = self._get_guild(ctx.guild.id)
+		state = await self._get_guild(ctx.guild.id)
 
-		if trigger_key not in guild_map:
+		if trigger_key not in state.triggers:
 			return await ctx.warn("Trigger not found")
 
-		del guild_map[trigger_key]
-		await self._save()
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				await cur.execute(
+					"DELETE FROM autoresponses WHERE guild_id = %s AND trigger_text = %s",
+					(ctx.guild.id, trigger_key)
+				)
+
+		del state.triggers[trigger_key]
+		state.changed()
 		await ctx.approve(f"Removed autoresponse for **{trigger}**")
 
 	@autoresponder.command(name="list", aliases=["all", "view"])
 	async def autoresponder_list(self, ctx):
 		"""List configured autoresponses for this guild"""
-		guild_map = self._get_guild(ctx.guild.id)
-		if not guild_map:
+		state = await self._get_guild(ctx.guild.id)
+		if not state.triggers:
 			return await ctx.warn("No autoresponses configured")
 
-		lines = [f"**{t}** → {r}" for t, r in guild_map.items()]
+		lines = []
+		for t, entry in state.triggers.items():
+			mode = f" `{entry['mode']}`" if entry["mode"] != "exact" else ""
+			lines.append(f"**{t}**{mode} → {entry['response']}")
 		embed = discord.Embed(description="\n".join(lines), color=Config.COLORS.DEFAULT)
 		embed.set_author(name="Autoresponses", icon_url=self.bot.user.display_avatar.url)
 		await ctx.send(embed=embed)
 
+	@autoresponder.command(name="cooldown", aliases=["cd"])
+	@commands.has_permissions(manage_guild=True)
+	async def autoresponder_cooldown(self, ctx, trigger: str = None, rate: int = None, per: float = None):
+		"""Set how often a trigger may reply in one channel (rate 0 restores the default)
+
+		Example: ;autoresponder cooldown "hello bot" 2 30
+		"""
+		if not trigger or rate is None:
+			return await ctx.send_help(ctx.command)
+
+		trigger_key = trigger.strip().lower()
+		state = await self._get_guild(ctx.guild.id)
+		if trigger_key not in state.triggers:
+			return await ctx.warn("Trigger not found")
+
+		if rate != 0 and (rate < 0 or per is None or per <= 0):
+			return await ctx.deny("Rate must be positive and the period greater than 0 seconds")
+
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				await cur.execute(
+					"UPDATE autoresponses SET cooldown_rate = %s, cooldown_per = %s WHERE guild_id = %s AND trigger_text = %s",
+					(rate or None, per if rate else None, ctx.guild.id, trigger_key)
+				)
+
+		entry = state.triggers[trigger_key]
+		if rate == 0:
+			entry.pop("cooldown", None)
+			return await ctx.approve(f"Reset the cooldown for **{trigger}**")
+
+		entry["cooldown"] = (rate, per)
+		await ctx.approve(f"**{trigger}** can now reply **{rate}** times every **{per:g}s** per channel")
+
+	@autoresponder.command(name="limit", aliases=["ratelimit"])
+	@commands.has_permissions(manage_guild=True)
+	async def autoresponder_limit(self, ctx, scope: str = None, rate: int = None, per: float = None):
+		"""Cap autoresponses per user or for the whole guild (rate 0 restores the default)
+
+		Example: ;autoresponder limit user 3 10
+		Example: ;autoresponder limit guild 20 10
+		"""
+		scope = scope.lower() if scope else None
+		if scope not in DEFAULT_LIMITS or rate is None:
+			return await ctx.send_help(ctx.command)
+
+		if rate != 0 and (rate < 0 or per is None or per <= 0):
+			return await ctx.deny("Rate must be positive and the period greater than 0 seconds")
+
+		state = await self._get_guild(ctx.guild.id)
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				if rate == 0:
+					await cur.execute(
+						"DELETE FROM autoresponder_limits WHERE guild_id = %s AND scope = %s",
+						(ctx.guild.id, scope)
+					)
+				else:
+					await cur.execute("""
+						INSERT INTO autoresponder_limits (guild_id, scope, rate, per) VALUES (%s, %s, %s, %s)
+						ON DUPLICATE KEY UPDATE rate = %s, per = %s
+					""", (ctx.guild.id, scope, rate, per, rate, per))
+
+		if rate == 0:
+			state.limits.pop(scope, None)
+			return await ctx.approve(f"Reset the {scope} limit")
+
+		state.limits[scope] = (rate, per)
+		await ctx.approve(f"Autoresponses are now limited to **{rate}** every **{per:g}s** per {scope}")
+
+	@autoresponder.command(name="stats")
+	@commands.has_permissions(manage_guild=True)
+	async def autoresponder_stats(self, ctx):
+		"""Show rate limits and how many replies they suppressed since startup"""
+		state = await self._get_guild(ctx.guild.id)
+		suppressed = state.suppressed
+		user_rate, user_per = state.limits.get("user", DEFAULT_LIMITS["user"])
+		guild_rate, guild_per = state.limits.get("guild", DEFAULT_LIMITS["guild"])
+		trigger_rate, trigger_per = DEFAULT_TRIGGER_COOLDOWN
+
+		embed = discord.Embed(color=Config.COLORS.DEFAULT)
+		embed.set_author(name="Autoresponder Limits", icon_url=self.bot.user.display_avatar.url)
+		embed.add_field(name="Trigger (default)", value=f"{trigger_rate}/{trigger_per:g}s per channel\n-# {suppressed['trigger']} suppressed", inline=True)
+		embed.add_field(name="User", value=f"{user_rate}/{user_per:g}s\n-# {suppressed['user']} suppressed", inline=True)
+		embed.add_field(name="Guild", value=f"{guild_rate}/{guild_per:g}s\n-# {suppressed['guild']} suppressed", inline=True)
+		await ctx.send(embed=embed)
+
 	@autoresponder.command(name="clear")
 	@commands.has_permissions(manage_guild=True)
 	async def autoresponder_clear(self, ctx):
 		"""Clear all autoresponses for this guild"""
-		guild_map = self._get_guild(ctx.guild.id)
-		if not guild_map:
+		state = await self._get_guild(ctx.guild.id)
+		if not state.triggers:
 			return await ctx.warn("No autoresponses to clear")
 
-		guild_map.clear()
-		await self._save()
+		async with self.bot.db_pool.acquire() as conn:
+			async with conn.cursor() as cur:
+				await cur.execute("DELETE FROM autoresponses WHERE guild_id = %s", (ctx.guild.id,))
+
+		state.triggers.clear()
+		state.changed()
 		await ctx.approve("Cleared all autoresponses")
 
 
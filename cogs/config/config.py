@@ -2,11 +2,15 @@ import discord
 import aiohttp
 import json
 import asyncio
+import re
+import time
+from collections import Counter, deque
 from discord.ext import commands
 from src.config import Config
+from src.tools.ratelimit import TokenBuckets
 import base64
 import aiohttp
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 class StarboardView(discord.ui.View):
     """View with jump-to-message button."""
@@ -20,6 +24,11 @@ class StarboardView(discord.ui.View):
         ))
 
 
+# Role assignments per guild and across the bot, kept under Discord's route limits
+AUTOROLE_GUILD_RATE = (10, 10.0)
+AUTOROLE_GLOBAL_RATE = (20, 1.0)
+
+
 class GuildConfig(commands.Cog):
     """Guild configuration commands: icon, banner, splash, starboard."""
 
@@ -33,6 +42,22 @@ class GuildConfig(commands.Cog):
         self.antinuke_data: dict = {}
         self.recent_actions: dict = {}  # guild_id -> executor_id -> list[timestamp]
         bot.loop.create_task(self._load_antinuke())
+        # Antiraid storage
+        self.antiraid_path = "src/antiraid.json"
+        self.antiraid_data: dict = {}
+        self.antiraid_loaded = asyncio.Event()
+        self.antiraid_save_lock = asyncio.Lock()
+        self.join_windows: dict = {}  # guild_id -> recent joins, name skeleton counts, suspicious count
+        self.raids: dict = {}  # guild_id -> active lockdown
+        self.raid_semaphore = asyncio.Semaphore(5)
+        bot.loop.create_task(self._load_antiraid())
+        # Autorole cache and assignment queue
+        self.autoroles: dict = {}  # guild_id -> [role_id]
+        self.autoroles_loaded = False
+        self.autorole_queues: dict = {}  # guild_id -> deque of members waiting for roles
+        self.autorole_workers: dict = {}  # guild_id -> Task draining that queue
+        self.autorole_buckets = TokenBuckets(max_keys=5000)
+        bot.loop.create_task(self._load_autoroles())
 
     async def download_to_data_uri(self, url: str):
         """Download an image and convert it to a data URI"""
@@ -373,6 +398,188 @@ class GuildConfig(commands.Cog):
                     except Exception:
                         pass
 
+    # -------------------- Antiraid helpers --------------------
+    async def _load_antiraid(self):
+        loop = asyncio.get_event_loop()
+
+        def _read():
+            try:
+                with open(self.antiraid_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return {}
+            except Exception:
+                return {}
+
+        self.antiraid_data = await loop.run_in_executor(None, _read)
+        self.antiraid_loaded.set()
+
+    async def _save_antiraid(self):
+        # Never overwrite the file with a half-loaded cache
+        await self.antiraid_loaded.wait()
+        loop = asyncio.get_event_loop()
+
+        def _write(payload):
+            with open(self.antiraid_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+
+        # Serialize on the loop so the executor never sees a dict mid-edit
+        payload = json.dumps(self.antiraid_data, ensure_ascii=False, indent=2)
+        async with self.antiraid_save_lock:
+            await loop.run_in_executor(None, _write, payload)
+
+    def _get_antiraid_config(self, guild_id: int) -> dict:
+        key = str(guild_id)
+        if key not in self.antiraid_data:
+            self.antiraid_data[key] = {
+                "enabled": False,
+                "joins": 10,
+                "window_seconds": 10,
+                "action": "quarantine",  # none | quarantine | kick | ban
+                "lockdown_minutes": 10
+            }
+        return self.antiraid_data[key]
+
+    def _join_score(self, member: discord.Member, now: datetime) -> int:
+        """How suspicious a new account looks; 2 or more counts as suspicious."""
+        score = 0
+        age = (now - member.created_at).total_seconds()
+        if age < 86400:
+            score += 2
+        elif age < 7 * 86400:
+            score += 1
+        if member.avatar is None:
+            score += 1
+        if re.search(r"\d{4,}$", member.name):
+            score += 1
+        return score
+
+    def _track_join(self, member: discord.Member) -> bool:
+        """Record a join in the guild's sliding window; True while the guild is locked down."""
+        guild = member.guild
+        cfg = self.antiraid_data.get(str(guild.id))
+        if not cfg or not cfg.get("enabled"):
+            return False
+
+        raid = self.raids.get(guild.id)
+        if raid:
+            raid["cohort"].append(member)
+            self._schedule_raid_action(guild)
+            return True
+
+        window = self.join_windows.setdefault(guild.id, {"joins": deque(), "skeletons": Counter(), "suspicious": 0})
+        joins, skeletons = window["joins"], window["skeletons"]
+        now = time.monotonic()
+        cutoff = now - cfg.get("window_seconds", 10)
+        while joins and joins[0][0] < cutoff:
+            _, _, was_suspicious, old = joins.popleft()
+            window["suspicious"] -= was_suspicious
+            skeletons[old] -= 1
+            if not skeletons[old]:
+                del skeletons[old]
+
+        # Bot waves tend to share a name with only the digits changed
+        skeleton = re.sub(r"\d+", "#", member.name.lower())
+        skeletons[skeleton] += 1
+        score = self._join_score(member, discord.utils.utcnow()) + (skeletons[skeleton] >= 3)
+        suspicious = score >= 2
+        joins.append((now, member, suspicious, skeleton))
+        window["suspicious"] += suspicious
+
+        count, threshold = len(joins), cfg.get("joins", 10)
+        if count < threshold or (window["suspicious"] * 2 < count and count < threshold * 3):
+            return False
+
+        cohort = [m for _, m, _, _ in joins]
+        self.join_windows.pop(guild.id, None)
+        raid = self.raids[guild.id] = {"cohort": cohort, "total": 0, "previous_level": None, "flushing": False, "task": None}
+        raid["task"] = self.bot.loop.create_task(self._run_lockdown(guild, cfg))
+        return True
+
+    def _schedule_raid_action(self, guild: discord.Guild):
+        raid = self.raids.get(guild.id)
+        if raid and not raid["flushing"]:
+            raid["flushing"] = True
+            self.bot.loop.create_task(self._flush_raid_cohort(guild))
+
+    async def _flush_raid_cohort(self, guild: discord.Guild):
+        # Give the rest of the wave a moment so bans go out in bulk
+        await asyncio.sleep(2)
+        raid = self.raids.get(guild.id)
+        if raid:
+            raid["flushing"] = False
+            await self._act_on_cohort(guild, raid)
+
+    async def _act_on_cohort(self, guild: discord.Guild, raid: dict):
+        cohort, raid["cohort"] = raid["cohort"], []
+        raid["total"] += len(cohort)
+        cfg = self._get_antiraid_config(guild.id)
+        action = cfg.get("action", "quarantine")
+        reason = "Antiraid: join burst"
+
+        if action == "ban":
+            for i in range(0, len(cohort), 200):
+                try:
+                    await guild.bulk_ban(cohort[i:i + 200], reason=reason, delete_message_seconds=3600)
+                except Exception as e:
+                    print(f"Antiraid bulk ban failed: {e}")
+            return
+
+        async def _one(member):
+            async with self.raid_semaphore:
+                try:
+                    if action == "kick":
+                        await member.kick(reason=reason)
+                    elif action == "quarantine":
+                        until = discord.utils.utcnow() + timedelta(minutes=cfg.get("lockdown_minutes", 10))
+                        await member.timeout(until, reason=reason)
+                except Exception as e:
+                    print(f"Antiraid failed to {action} {member}: {e}")
+
+        if action in ("kick", "quarantine"):
+            await asyncio.gather(*(_one(m) for m in cohort))
+
+    async def _run_lockdown(self, guild: discord.Guild, cfg: dict):
+        raid = self.raids[guild.id]
+        try:
+            previous = guild.verification_level
+            if previous < discord.VerificationLevel.high:
+                try:
+                    await guild.edit(verification_level=discord.VerificationLevel.high, reason="Antiraid: join burst")
+                    raid["previous_level"] = previous
+                except Exception as e:
+                    print(f"Antiraid failed to raise verification level: {e}")
+
+            await self._act_on_cohort(guild, raid)
+            await self._raid_log(guild, f"Join burst detected: **{raid['total']}** members handled with `{cfg.get('action')}`. "
+                                        f"Autoroles are paused for {cfg.get('lockdown_minutes', 10)} minutes.")
+            await asyncio.sleep(cfg.get("lockdown_minutes", 10) * 60)
+        finally:
+            await self._end_lockdown(guild)
+
+    async def _end_lockdown(self, guild: discord.Guild):
+        raid = self.raids.pop(guild.id, None)
+        if not raid:
+            return
+        if raid["previous_level"] is not None:
+            try:
+                await guild.edit(verification_level=raid["previous_level"], reason="Antiraid: lockdown ended")
+            except Exception as e:
+                print(f"Antiraid failed to restore verification level: {e}")
+        await self._raid_log(guild, f"Lockdown ended after **{raid['total']}** members")
+
+    async def _raid_log(self, guild: discord.Guild, text: str):
+        modlog_id = self._get_antinuke_config(guild.id).get("modlog_channel_id")
+        channel = self.bot.get_channel(modlog_id) if modlog_id else guild.system_channel
+        if not isinstance(channel, discord.TextChannel):
+            return
+        embed = discord.Embed(title="Antiraid", description=text, color=discord.Color.red(),
+                              timestamp=datetime.now(timezone.utc))
+        try:
+            await channel.send(embed=embed)
+        except Exception:
+            pass
+
     async def _setup_autorole_table(self):
         """Create autorole table if it doesn't exist"""
         if not self.bot.db_pool:
@@ -392,8 +599,27 @@ class GuildConfig(commands.Cog):
         except Exception as e:
             print(f"Error setting up autorole table: {e}")
 
+    async def _load_autoroles(self):
+        """Create the autorole table and cache every guild's autoroles in one query"""
+        await self.bot.wait_until_ready()
+        await self._setup_autorole_table()
+        if not self.bot.db_pool:
+            return
+
+        try:
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT guild_id, role_id FROM autoroles")
+                    for guild_id, role_id in await cur.fetchall():
+                        self.autoroles.setdefault(guild_id, []).append(role_id)
+            self.autoroles_loaded = True
+        except Exception as e:
+            print(f"Error loading autoroles: {e}")
+
     async def _get_autoroles(self, guild_id: int) -> list:
         """Get all autoroles for a guild"""
+        if self.autoroles_loaded:
+            return list(self.autoroles.get(guild_id, []))
         if not self.bot.db_pool:
             return []
         
@@ -423,6 +649,9 @@ class GuildConfig(commands.Cog):
                         (guild_id, role_id)
                     )
                     await conn.commit()
+                    roles = self.autoroles.setdefault(guild_id, [])
+                    if role_id not in roles:
+                        roles.append(role_id)
                     return True
         except Exception as e:
             print(f"Error adding autorole: {e}")
@@ -441,6 +670,11 @@ class GuildConfig(commands.Cog):
                         (guild_id, role_id)
                     )
                     await conn.commit()
+                    roles = self.autoroles.get(guild_id, [])
+                    if role_id in roles:
+                        roles.remove(role_id)
+                    if not roles:
+                        self.autoroles.pop(guild_id, None)
                     return True
         except Exception as e:
             print(f"Error removing autorole: {e}")
@@ -948,6 +1182,98 @@ class GuildConfig(commands.Cog):
         punish = cfg.get("punish", "kick")
         await ctx.approve(f"Test: would punish {member.mention} with {punish} (dry-run)")
 
+    # ==================== ANTIRAID COMMANDS ====================
+
+    @commands.group(name="antiraid", invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid(self, ctx):
+        """Manage join burst protection."""
+        await ctx.send_help(ctx.command)
+
+    @antiraid.command(name="enable")
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid_enable(self, ctx):
+        """Enable join burst detection."""
+        await self.antiraid_loaded.wait()
+        cfg = self._get_antiraid_config(ctx.guild.id)
+        cfg["enabled"] = True
+        await self._save_antiraid()
+        await ctx.approve("Antiraid enabled")
+
+    @antiraid.command(name="disable")
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid_disable(self, ctx):
+        """Disable join burst detection."""
+        await self.antiraid_loaded.wait()
+        cfg = self._get_antiraid_config(ctx.guild.id)
+        cfg["enabled"] = False
+        self.join_windows.pop(ctx.guild.id, None)
+        await self._save_antiraid()
+        await ctx.approve("Antiraid disabled")
+
+    @antiraid.command(name="threshold")
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid_threshold(self, ctx, joins: int = None, seconds: int = None):
+        """Set how many joins within how many seconds count as a raid."""
+        if joins is None or joins < 3 or (seconds is not None and not 1 <= seconds <= 300):
+            return await ctx.send_help(ctx.command)
+        await self.antiraid_loaded.wait()
+        cfg = self._get_antiraid_config(ctx.guild.id)
+        cfg["joins"] = joins
+        if seconds is not None:
+            cfg["window_seconds"] = seconds
+        await self._save_antiraid()
+        await ctx.approve(f"Antiraid triggers at {joins} joins in {cfg['window_seconds']}s")
+
+    @antiraid.command(name="action")
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid_action(self, ctx, action: str = None):
+        """Set what happens to raid accounts: none | quarantine | kick | ban"""
+        if action not in ("none", "quarantine", "kick", "ban"):
+            return await ctx.send_help(ctx.command)
+        await self.antiraid_loaded.wait()
+        cfg = self._get_antiraid_config(ctx.guild.id)
+        cfg["action"] = action
+        await self._save_antiraid()
+        await ctx.approve(f"Antiraid action set to {action}")
+
+    @antiraid.command(name="lockdown")
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid_lockdown(self, ctx, minutes: int = None):
+        """Set how long a lockdown lasts in minutes."""
+        if minutes is None or not 1 <= minutes <= 1440:
+            return await ctx.send_help(ctx.command)
+        await self.antiraid_loaded.wait()
+        cfg = self._get_antiraid_config(ctx.guild.id)
+        cfg["lockdown_minutes"] = minutes
+        await self._save_antiraid()
+        await ctx.approve(f"Antiraid lockdowns last {minutes} minutes")
+
+    @antiraid.command(name="lift")
+    @commands.has_permissions(manage_guild=True)
+    async def antiraid_lift(self, ctx):
+        """End the current lockdown early."""
+        raid = self.raids.get(ctx.guild.id)
+        if not raid:
+            return await ctx.warn("There is no active lockdown")
+        raid["task"].cancel()
+        await ctx.approve("Lockdown lifted")
+
+    @antiraid.command(name="status")
+    async def antiraid_status(self, ctx):
+        """Show antiraid configuration and lockdown state."""
+        await self.antiraid_loaded.wait()
+        cfg = self._get_antiraid_config(ctx.guild.id)
+        raid = self.raids.get(ctx.guild.id)
+        embed = discord.Embed(color=discord.Color.red() if cfg.get("enabled") else discord.Color.greyple())
+        embed.set_author(name="Antiraid Status")
+        embed.add_field(name="Enabled", value=str(cfg.get("enabled")), inline=True)
+        embed.add_field(name="Threshold", value=f"{cfg.get('joins')} joins / {cfg.get('window_seconds')}s", inline=True)
+        embed.add_field(name="Action", value=str(cfg.get("action")), inline=True)
+        embed.add_field(name="Lockdown", value=f"{cfg.get('lockdown_minutes')} minutes", inline=True)
+        embed.add_field(name="Active", value=(f"Yes, {raid['total'] + len(raid['cohort'])} members" if raid else "No"), inline=True)
+        await ctx.send(embed=embed)
+
     # ==================== AUTOROLE COMMANDS ====================
 
     @commands.group(name="autorole", invoke_without_command=True)
@@ -1031,28 +1357,59 @@ class GuildConfig(commands.Cog):
         """Automatically assign autoroles to new members."""
         if member.bot:
             return
-        
 
-        await self._setup_autorole_table()
-        
+        # Joins during a raid lockdown don't get autoroles
+        if self._track_join(member):
+            return
 
         autoroles = await self._get_autoroles(member.guild.id)
         
         if not autoroles:
             return
-        
 
-        roles_to_add = []
-        for role_id in autoroles:
-            role = member.guild.get_role(role_id)
-            if role and role < member.guild.me.top_role:
-                roles_to_add.append(role)
-        
-        if roles_to_add:
-            try:
-                await member.add_roles(*roles_to_add, reason="Autorole assignment")
-            except Exception as e:
-                print(f"Error assigning autoroles to {member}: {e}")
+        queue = self.autorole_queues.setdefault(member.guild.id, deque())
+        queue.append(member)
+        if member.guild.id not in self.autorole_workers:
+            self.autorole_workers[member.guild.id] = self.bot.loop.create_task(self._drain_autoroles(member.guild))
+
+    async def _wait_for_autorole_slot(self, guild_id: int):
+        guild_rate, guild_per = AUTOROLE_GUILD_RATE
+        global_rate, global_per = AUTOROLE_GLOBAL_RATE
+        while self.autorole_buckets.acquire([
+            (("guild", guild_id), guild_rate, guild_per),
+            (("global",), global_rate, global_per),
+        ]) is not None:
+            await asyncio.sleep(guild_per / guild_rate)
+
+    async def _drain_autoroles(self, guild: discord.Guild):
+        """Assign autoroles to queued joiners at a pace the role routes allow"""
+        queue = self.autorole_queues[guild.id]
+        try:
+            while queue:
+                member = queue.popleft()
+                # A lockdown may have started, or the member left, while they waited
+                if guild.id in self.raids or not guild.get_member(member.id):
+                    continue
+
+                roles_to_add = []
+                for role_id in await self._get_autoroles(guild.id):
+                    role = guild.get_role(role_id)
+                    if role and role < guild.me.top_role and role not in member.roles:
+                        roles_to_add.append(role)
+                if not roles_to_add:
+                    continue
+
+                # One atomic PUT per role, so roles added by anyone else in the meantime are kept
+                for role in roles_to_add:
+                    await self._wait_for_autorole_slot(guild.id)
+                    try:
+                        await member.add_roles(role, reason="Autorole assignment")
+                    except Exception as e:
+                        print(f"Error assigning autorole {role.id} to {member}: {e}")
+        finally:
+            self.autorole_workers.pop(guild.id, None)
+            if not queue:
+                self.autorole_queues.pop(guild.id, None)
 
     @commands.group(name="customize", invoke_without_command=True)
     @commands.has_permissions(administrator=True)
@@ -1,10 +1,27 @@
 import discord
-from discord.ext import commands
+import asyncio
+import math
+import time
+from collections import deque
+from datetime import datetime, timezone, timedelta
+from discord.ext import commands, tasks
 from discord import ui
 from src.config import Config
 from typing import Optional
 
 
+MAX_POOL_SIZE = 3
+RECONCILE_CONCURRENCY = 5
+RECONCILE_GRACE = timedelta(seconds=60)  # don't touch channels a member is still being moved into
+
+
+def percentile(samples, pct: float) -> float:
+    """Return the nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
 class VMEmojis:
     LOCK = "<:lock:1452719565309214944>"
     UNLOCK = "<:unlock:1452719577393008691>"
@@ -41,13 +58,10 @@ class VoiceMasterView(ui.View):
         if not interaction.user.voice or not interaction.user.voice.channel:
             return None, "You must be in a voice channel"
         channel = interaction.user.voice.channel
-        async with self.cog.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.cog.get_owner(channel.id)
+        if owner_id is None:
             return None, "This is not a VoiceMaster channel"
-        return channel, result[0]
+        return channel, owner_id
 
     async def check_owner(self, interaction: discord.Interaction):
         channel, result = await self.get_user_vc(interaction)
@@ -97,18 +111,16 @@ class VoiceMasterView(ui.View):
         if not interaction.user.voice or not interaction.user.voice.channel:
             return await interaction.response.send_message(embed=discord.Embed(description=f"{Config.EMOJIS.ERROR} {interaction.user.mention}: You must be in a voice channel", color=Config.COLORS.ERROR), ephemeral=True)
         channel = interaction.user.voice.channel
-        async with self.cog.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.cog.get_owner(channel.id)
+        if owner_id is None:
             return await interaction.response.send_message(embed=discord.Embed(description=f"{Config.EMOJIS.ERROR} {interaction.user.mention}: This is not a VoiceMaster channel", color=Config.COLORS.ERROR), ephemeral=True)
-        owner = interaction.guild.get_member(result[0])
+        owner = interaction.guild.get_member(owner_id)
         if owner and owner in channel.members:
             return await interaction.response.send_message(embed=discord.Embed(description=f"{Config.EMOJIS.ERROR} {interaction.user.mention}: The owner is still in the channel", color=Config.COLORS.ERROR), ephemeral=True)
         async with self.cog.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("UPDATE voicemaster_channels SET owner_id = %s WHERE channel_id = %s", (interaction.user.id, channel.id))
+        self.cog.channels[channel.id]['owner_id'] = interaction.user.id
         await channel.edit(name=f"{interaction.user.display_name}'s channel")
         await interaction.response.send_message(embed=discord.Embed(description=f"{Config.EMOJIS.SUCCESS} {interaction.user.mention}: You now own this voice channel", color=Config.COLORS.SUCCESS), ephemeral=True)
 
@@ -137,6 +149,7 @@ class VoiceMasterView(ui.View):
         if not channel:
             return
         await channel.delete()
+        self.cog.channels.pop(channel.id, None)
         async with self.cog.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("DELETE FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
@@ -148,6 +161,12 @@ class VoiceMaster(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.settings = {}  # guild_id -> {'category_id', 'jtc_channel_id', 'interface_channel_id'}
+        self.channels = {}  # channel_id -> {'guild_id', 'owner_id'}, owner_id is None for spares
+        self.pool_sizes = {}  # guild_id -> number of hidden spare channels to keep ready
+        self.pools = {}  # guild_id -> [spare channel_id, ...]
+        self.pool_locks = {}  # guild_id -> asyncio.Lock
+        self.join_latencies = {'warm': deque(maxlen=500), 'cold': deque(maxlen=500)}  # seconds from JTC join to move
         self.bot.add_view(VoiceMasterView(self))
 
     async def cog_load(self):
@@ -168,42 +187,189 @@ class VoiceMaster(commands.Cog):
                         owner_id BIGINT
                     )
                 """)
+                await cur.execute("""
+                    CREATE TABLE IF NOT EXISTS voicemaster_pool (
+                        guild_id BIGINT PRIMARY KEY,
+                        size INT NOT NULL
+                    )
+                """)
+                await self.load_cache(cur)
+        self.bot.loop.create_task(self.warm_pools())
+        self.reconcile_channels.start()
+
+    def cog_unload(self):
+        self.reconcile_channels.cancel()
+
+    async def load_cache(self, cur):
+        """Load VoiceMaster settings and channel owners into memory"""
+        await cur.execute("SELECT guild_id, category_id, jtc_channel_id, interface_channel_id FROM voicemaster_settings")
+        self.settings = {
+            guild_id: {
+                'category_id': category_id,
+                'jtc_channel_id': jtc_channel_id,
+                'interface_channel_id': interface_channel_id
+            }
+            for guild_id, category_id, jtc_channel_id, interface_channel_id in await cur.fetchall()
+        }
+        await cur.execute("SELECT channel_id, guild_id, owner_id FROM voicemaster_channels")
+        self.channels = {
+            channel_id: {'guild_id': guild_id, 'owner_id': owner_id}
+            for channel_id, guild_id, owner_id in await cur.fetchall()
+        }
+        await cur.execute("SELECT guild_id, size FROM voicemaster_pool")
+        self.pool_sizes = {guild_id: size for guild_id, size in await cur.fetchall()}
+        self.pools = {}
+        for channel_id, data in self.channels.items():
+            if data['owner_id'] is None:
+                self.pools.setdefault(data['guild_id'], []).append(channel_id)
+
+    def get_owner(self, channel_id: int) -> Optional[int]:
+        """Return the owner of a VoiceMaster channel, or None if it isn't one"""
+        data = self.channels.get(channel_id)
+        return data['owner_id'] if data else None
+
+    async def warm_pools(self):
+        """Top up every configured warm pool once the guild cache is available"""
+        await self.bot.wait_until_ready()
+        for guild_id in list(self.pool_sizes):
+            guild = self.bot.get_guild(guild_id)
+            if guild:
+                await self.fill_pool(guild)
+
+    async def fill_pool(self, guild: discord.Guild):
+        """Create hidden spare channels until the guild's warm pool is full"""
+        lock = self.pool_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            settings = self.settings.get(guild.id)
+            if not settings:
+                return
+            category = guild.get_channel(settings['category_id'])
+            if not category:
+                return
+            pool = self.pools.setdefault(guild.id, [])
+            while len(pool) < self.pool_sizes.get(guild.id, 0):
+                try:
+                    vc = await guild.create_voice_channel(
+                        name="VoiceMaster",
+                        category=category,
+                        overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+                        reason="VoiceMaster: Warm pool"
+                    )
+                except discord.HTTPException:
+                    return
+                self.channels[vc.id] = {'guild_id': guild.id, 'owner_id': None}
+                pool.append(vc.id)
+                async with self.bot.db_pool.acquire() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute("INSERT INTO voicemaster_channels (channel_id, guild_id, owner_id) VALUES (%s, %s, NULL)", (vc.id, guild.id))
+
+    def take_spare(self, guild: discord.Guild) -> Optional[discord.VoiceChannel]:
+        """Pop a ready spare channel from the guild's warm pool"""
+        pool = self.pools.get(guild.id)
+        while pool:
+            channel_id = pool.pop(0)
+            vc = guild.get_channel(channel_id)
+            if vc:
+                return vc
+            self.channels.pop(channel_id, None)
+        return None
+
+    @tasks.loop(minutes=10)
+    async def reconcile_channels(self):
+        """Delete empty temporary channels and rows whose channel no longer exists"""
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT channel_id, guild_id FROM voicemaster_channels")
+                rows = await cur.fetchall()
+
+        cutoff = datetime.now(timezone.utc) - RECONCILE_GRACE
+        stale_ids = []
+        empty_channels = []
+        for channel_id, guild_id in rows:
+            guild = self.bot.get_guild(guild_id)
+            if guild and guild.unavailable:
+                continue
+            channel = guild.get_channel(channel_id) if guild else None
+            if not channel:
+                stale_ids.append(channel_id)
+            elif not channel.members and channel.created_at < cutoff and channel_id not in self.pools.get(guild_id, []):
+                empty_channels.append(channel)
+
+        semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+        async def delete(channel):
+            async with semaphore:
+                try:
+                    await channel.delete(reason="VoiceMaster: Channel empty")
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException:
+                    return None
+                return channel.id
 
+        deleted = await asyncio.gather(*(delete(channel) for channel in empty_channels))
+        stale_ids.extend(channel_id for channel_id in deleted if channel_id)
+        if not stale_ids:
+            return
+
+        for channel_id in stale_ids:
+            self.channels.pop(channel_id, None)
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                placeholders = ", ".join(["%s"] * len(stale_ids))
+                await cur.execute(f"DELETE FROM voicemaster_channels WHERE channel_id IN ({placeholders})", stale_ids)
+
+    @reconcile_channels.before_loop
+    async def before_reconcile(self):
+        await self.bot.wait_until_ready()
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        # Mutes, deafens and streams don't move the member anywhere
+        if before.channel == after.channel:
+            return
+
         # User joined a channel
-        if after.channel:
-            async with self.bot.db_pool.acquire() as conn:
-                async with conn.cursor() as cur:
-                    await cur.execute("SELECT category_id, jtc_channel_id FROM voicemaster_settings WHERE guild_id = %s", (member.guild.id,))
-                    settings = await cur.fetchone()
-            
-            if settings and after.channel.id == settings[1]:
-                category = member.guild.get_channel(settings[0])
+        settings = self.settings.get(member.guild.id)
+        if after.channel and settings and after.channel.id == settings['jtc_channel_id']:
+            started = time.perf_counter()
+            vc = self.take_spare(member.guild)
+            if vc:
+                self.channels[vc.id]['owner_id'] = member.id
+                await member.move_to(vc)
+                self.join_latencies['warm'].append(time.perf_counter() - started)
+                self.bot.loop.create_task(self.fill_pool(member.guild))
+                try:
+                    await vc.edit(name=f"{member.display_name}'s channel", sync_permissions=True)
+                except discord.HTTPException:
+                    pass
+                async with self.bot.db_pool.acquire() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute("UPDATE voicemaster_channels SET owner_id = %s WHERE channel_id = %s", (member.id, vc.id))
+            else:
+                category = member.guild.get_channel(settings['category_id'])
                 if category:
                     vc = await member.guild.create_voice_channel(
                         name=f"{member.display_name}'s channel",
                         category=category,
                         reason="VoiceMaster: User joined JTC"
                     )
+                    self.channels[vc.id] = {'guild_id': member.guild.id, 'owner_id': member.id}
                     await member.move_to(vc)
+                    self.join_latencies['cold'].append(time.perf_counter() - started)
+                    if self.pool_sizes.get(member.guild.id):
+                        self.bot.loop.create_task(self.fill_pool(member.guild))
                     async with self.bot.db_pool.acquire() as conn:
                         async with conn.cursor() as cur:
                             await cur.execute("INSERT INTO voicemaster_channels (channel_id, guild_id, owner_id) VALUES (%s, %s, %s)", (vc.id, member.guild.id, member.id))
 
         # User left a channel
-        if before.channel:
+        if before.channel and before.channel.id in self.channels and len(before.channel.members) == 0:
+            self.channels.pop(before.channel.id, None)
+            await before.channel.delete(reason="VoiceMaster: Channel empty")
             async with self.bot.db_pool.acquire() as conn:
                 async with conn.cursor() as cur:
-                    await cur.execute("SELECT channel_id FROM voicemaster_channels WHERE channel_id = %s", (before.channel.id,))
-                    result = await cur.fetchone()
-            
-            if result and len(before.channel.members) == 0:
-                await before.channel.delete(reason="VoiceMaster: Channel empty")
-                async with self.bot.db_pool.acquire() as conn:
-                    async with conn.cursor() as cur:
-                        await cur.execute("DELETE FROM voicemaster_channels WHERE channel_id = %s", (before.channel.id,))
+                    await cur.execute("DELETE FROM voicemaster_channels WHERE channel_id = %s", (before.channel.id,))
 
     @commands.group(name="voicemaster", aliases=["vm"], invoke_without_command=True)
     async def voicemaster(self, ctx):
@@ -214,11 +380,8 @@ class VoiceMaster(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def vm_setup(self, ctx):
         """Setup the VoiceMaster system"""
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT * FROM voicemaster_settings WHERE guild_id = %s", (ctx.guild.id,))
-                if await cur.fetchone():
-                    return await ctx.deny("VoiceMaster is already setup in this server")
+        if ctx.guild.id in self.settings:
+            return await ctx.deny("VoiceMaster is already setup in this server")
 
         category = await ctx.guild.create_category("slit vm")
         jtc = await ctx.guild.create_voice_channel("Join To Create", category=category)
@@ -231,6 +394,11 @@ class VoiceMaster(commands.Cog):
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("INSERT INTO voicemaster_settings (guild_id, category_id, jtc_channel_id, interface_channel_id) VALUES (%s, %s, %s, %s)", (ctx.guild.id, category.id, jtc.id, interface.id))
+        self.settings[ctx.guild.id] = {
+            'category_id': category.id,
+            'jtc_channel_id': jtc.id,
+            'interface_channel_id': interface.id
+        }
 
         embed = discord.Embed(
             title="Voicemaster Menu",
@@ -255,13 +423,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         await channel.set_permissions(ctx.guild.default_role, connect=False)
         await ctx.approve("Locked your voice channel")
@@ -272,13 +437,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         await channel.set_permissions(ctx.guild.default_role, connect=True)
         await ctx.approve("Unlocked your voice channel")
@@ -289,13 +451,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         await channel.set_permissions(ctx.guild.default_role, view_channel=False)
         await ctx.approve("Hidden your voice channel")
@@ -306,13 +465,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         await channel.set_permissions(ctx.guild.default_role, view_channel=True)
         await ctx.approve("Revealed your voice channel")
@@ -323,18 +479,16 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        owner = ctx.guild.get_member(result[0])
+        owner = ctx.guild.get_member(owner_id)
         if owner and owner in channel.members:
             return await ctx.deny("The owner is still in the channel")
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("UPDATE voicemaster_channels SET owner_id = %s WHERE channel_id = %s", (ctx.author.id, channel.id))
+        self.channels[channel.id]['owner_id'] = ctx.author.id
         await channel.edit(name=f"{ctx.author.display_name}'s channel")
         await ctx.approve("You now own this voice channel")
 
@@ -345,13 +499,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         limit = channel.user_limit + 1 if channel.user_limit < 99 else 99
         await channel.edit(user_limit=limit)
@@ -363,13 +514,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         limit = channel.user_limit - 1 if channel.user_limit > 0 else 0
         await channel.edit(user_limit=limit)
@@ -381,13 +529,10 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         await channel.edit(name=name)
         await ctx.approve(f"Renamed your voice channel to **{name}**")
@@ -398,15 +543,13 @@ class VoiceMaster(commands.Cog):
         if not ctx.author.voice or not ctx.author.voice.channel:
             return await ctx.deny("You must be in a voice channel")
         channel = ctx.author.voice.channel
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT owner_id FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
-                result = await cur.fetchone()
-        if not result:
+        owner_id = self.get_owner(channel.id)
+        if owner_id is None:
             return await ctx.deny("This is not a VoiceMaster channel")
-        if result[0] != ctx.author.id:
+        if owner_id != ctx.author.id:
             return await ctx.deny("You don't own this channel")
         await channel.delete()
+        self.channels.pop(channel.id, None)
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("DELETE FROM voicemaster_channels WHERE channel_id = %s", (channel.id,))
@@ -415,14 +558,12 @@ class VoiceMaster(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def vm_reset(self, ctx):
         """Reset the VoiceMaster system"""
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT category_id, jtc_channel_id, interface_channel_id FROM voicemaster_settings WHERE guild_id = %s", (ctx.guild.id,))
-                settings = await cur.fetchone()
+        settings = self.settings.pop(ctx.guild.id, None)
         if not settings:
             return await ctx.deny("VoiceMaster is not setup in this server")
         
-        for channel_id in settings:
+        spares = self.pools.pop(ctx.guild.id, [])
+        for channel_id in [*settings.values(), *spares]:
             channel = ctx.guild.get_channel(channel_id)
             if channel:
                 try:
@@ -434,9 +575,73 @@ class VoiceMaster(commands.Cog):
             async with conn.cursor() as cur:
                 await cur.execute("DELETE FROM voicemaster_settings WHERE guild_id = %s", (ctx.guild.id,))
                 await cur.execute("DELETE FROM voicemaster_channels WHERE guild_id = %s", (ctx.guild.id,))
+                await cur.execute("DELETE FROM voicemaster_pool WHERE guild_id = %s", (ctx.guild.id,))
+        self.pool_sizes.pop(ctx.guild.id, None)
+        self.channels = {cid: data for cid, data in self.channels.items() if data['guild_id'] != ctx.guild.id}
         
         await ctx.approve("VoiceMaster has been reset")
 
+    @voicemaster.command(name="pool", aliases=["warm"])
+    @commands.has_permissions(administrator=True)
+    async def vm_pool(self, ctx, size: int = None):
+        """Keep hidden spare channels ready so joins are moved instantly"""
+        if ctx.guild.id not in self.settings:
+            return await ctx.deny("VoiceMaster is not setup in this server")
+        if size is None:
+            return await ctx.neutral(f"Warm pool size is **{self.pool_sizes.get(ctx.guild.id, 0)}**")
+        if size < 0 or size > MAX_POOL_SIZE:
+            return await ctx.deny(f"Pool size must be between 0 and {MAX_POOL_SIZE}")
+
+        async with self.bot.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                if size == 0:
+                    await cur.execute("DELETE FROM voicemaster_pool WHERE guild_id = %s", (ctx.guild.id,))
+                else:
+                    await cur.execute("""
+                        INSERT INTO voicemaster_pool (guild_id, size) VALUES (%s, %s)
+                        ON DUPLICATE KEY UPDATE size = %s
+                    """, (ctx.guild.id, size, size))
+        if size == 0:
+            self.pool_sizes.pop(ctx.guild.id, None)
+        else:
+            self.pool_sizes[ctx.guild.id] = size
+
+        # Drop spares beyond the new size, then top up in the background
+        pool = self.pools.get(ctx.guild.id, [])
+        while len(pool) > size:
+            channel_id = pool.pop()
+            self.channels.pop(channel_id, None)
+            channel = ctx.guild.get_channel(channel_id)
+            if channel:
+                try:
+                    await channel.delete(reason="VoiceMaster: Warm pool shrunk")
+                except discord.HTTPException:
+                    pass
+            async with self.bot.db_pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("DELETE FROM voicemaster_channels WHERE channel_id = %s", (channel_id,))
+        self.bot.loop.create_task(self.fill_pool(ctx.guild))
+        await ctx.approve(f"Warm pool size set to **{size}**")
+
+    @voicemaster.command(name="latency", aliases=["stats"])
+    async def vm_latency(self, ctx):
+        """Show join-to-move latency for warm and cold channel creation"""
+        lines = []
+        for kind, samples in self.join_latencies.items():
+            if samples:
+                lines.append(
+                    f"**{kind.title()}**: p50 `{percentile(samples, 50) * 1000:.0f}ms` "
+                    f"p95 `{percentile(samples, 95) * 1000:.0f}ms` ({len(samples)} joins)"
+                )
+            else:
+                lines.append(f"**{kind.title()}**: no joins yet")
+        embed = discord.Embed(
+            title="VoiceMaster Join Latency",
+            description="\n".join(lines),
+            color=Config.COLORS.DEFAULT
+        )
+        await ctx.send(embed=embed)
+
 
 async def setup(bot):
     await bot.add_cog(VoiceMaster(bot))
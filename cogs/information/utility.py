@@ -5,17 +5,18 @@ import time
 from typing import Optional
 import re
 import aiohttp
-from io import BytesIO
-from PIL import Image
-from collections import Counter
+from collections import OrderedDict, deque
 import platform
 import os
 import psutil
 import random
 import json
+import asyncio
+import itertools
 from discord.ui import Button, View
 from src.tools.paginator import PaginatorView
-from datetime import datetime
+from src.tools.imageanalysis import ImageAnalyzer, ImageTooLarge, MAX_BYTES
+from datetime import datetime, timedelta
 from discord import Member
 
 try:
@@ -50,13 +51,92 @@ def set_user_timezone(user_id, tz):
     save_timezones(data)
 
 
+class SnipedMessage:
+    """What snipe needs from a deleted or edited message, without keeping the Message alive"""
+
+    __slots__ = ("author_id", "content", "attachments", "at")
+
+    def __init__(self, message: discord.Message):
+        self.author_id = message.author.id
+        self.content = message.content
+        self.attachments = tuple(a.url for a in message.attachments)
+        self.at = discord.utils.utcnow()
+
+
+class SnipeCache:
+    """Recent records per channel that expire after ttl, capped across all channels with LRU eviction"""
+
+    def __init__(self, per_channel: int = 10, ttl: int = 7200, max_records: int = 20000):
+        self.per_channel = per_channel
+        self.ttl = timedelta(seconds=ttl)
+        self.max_records = max_records
+        self.channels = OrderedDict()  # channel_id -> deque of records, least recently touched first
+        self.size = 0
+
+    def add(self, channel_id: int, record: SnipedMessage):
+        records = self.channels.get(channel_id)
+        if records is None:
+            records = self.channels[channel_id] = deque()
+        self.channels.move_to_end(channel_id)
+        records.append(record)
+        self.size += 1
+        if len(records) > self.per_channel:
+            records.popleft()
+            self.size -= 1
+
+        while self.size > self.max_records:
+            oldest_id, oldest = next(iter(self.channels.items()))
+            oldest.popleft()
+            self.size -= 1
+            if not oldest:
+                del self.channels[oldest_id]
+
+    def get(self, channel_id: int) -> list:
+        """Unexpired records for a channel, oldest first"""
+        records = self.channels.get(channel_id)
+        if not records:
+            return []
+        cutoff = discord.utils.utcnow() - self.ttl
+        while records and records[0].at < cutoff:
+            records.popleft()
+            self.size -= 1
+        if not records:
+            del self.channels[channel_id]
+        return list(records)
+
+    def clear(self, channel_id: int) -> int:
+        records = self.channels.pop(channel_id, None) or ()
+        self.size -= len(records)
+        return len(records)
+
+
 class Utility(commands.Cog):
     """Useful utility commands"""
     def __init__(self, bot):
         self.bot = bot
-        self.snipe_cache = {}  # Format: {channel_id: [(message, deleted_at), ...]}
+        self.snipe_cache = SnipeCache()  # deleted messages
+        self.editsnipe_cache = SnipeCache()  # message content from before an edit
         self.afk = {}  # {guild_id: {user_id: (reason, since_timestamp)}}
+        self.afk_writes = asyncio.Queue()  # ("set", guild_id, user_id, reason) | ("remove", guild_id, user_id)
         bot.loop.create_task(self._setup_afk_table())
+        self.afk_writer = bot.loop.create_task(self._afk_writer())
+        self.images = ImageAnalyzer()
+        # botinfo numbers: code stats are scanned once per load, totals follow gateway events
+        self.code_stats = None  # (lines, files, imports)
+        self.total_users = 0
+        self.total_channels = 0
+        bot.loop.create_task(self._load_code_stats())
+        if bot.is_ready():
+            self._count_totals()
+
+    async def cog_unload(self):
+        self.images.close()
+        self.afk_writer.cancel()
+        pending = []
+        while not self.afk_writes.empty():
+            pending.append(self.afk_writes.get_nowait())
+        if pending:
+            await self._write_afk_batch(pending)
 
     async def _setup_afk_table(self):
         await self.bot.wait_until_ready()
@@ -86,69 +166,163 @@ class Utility(commands.Cog):
                         self.afk[gid] = {}
                     self.afk[gid][uid] = (reason or "", int(since_ts) if since_ts else int(datetime.utcnow().timestamp()))
 
-    async def _set_afk_db(self, guild_id: int, user_id: int, reason: str):
-        if not getattr(self.bot, 'db_pool', None):
-            return
-        async with self.bot.db_pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    """
-                    INSERT INTO afk_status (guild_id, user_id, reason)
-                    VALUES (%s, %s, %s)
-                    ON DUPLICATE KEY UPDATE reason = VALUES(reason), since = CURRENT_TIMESTAMP
-                    """,
-                    (guild_id, user_id, reason)
-                )
+    def _set_afk_db(self, guild_id: int, user_id: int, reason: str):
+        self.afk_writes.put_nowait(("set", guild_id, user_id, reason))
+
+    def _remove_afk_db(self, guild_id: int, user_id: int):
+        self.afk_writes.put_nowait(("remove", guild_id, user_id))
 
-    async def _remove_afk_db(self, guild_id: int, user_id: int):
+    async def _afk_writer(self):
+        """Apply queued AFK writes in order, batching whatever piled up since the last round"""
+        await self.bot.wait_until_ready()
+        while True:
+            batch = [await self.afk_writes.get()]
+            while len(batch) < 100 and not self.afk_writes.empty():
+                batch.append(self.afk_writes.get_nowait())
+            try:
+                await self._write_afk_batch(batch)
+            except Exception as e:
+                print(f"Error writing AFK status: {e}")
+
+    async def _write_afk_batch(self, batch: list):
         if not getattr(self.bot, 'db_pool', None):
             return
         async with self.bot.db_pool.acquire() as conn:
             async with conn.cursor() as cur:
-                await cur.execute(
-                    "DELETE FROM afk_status WHERE guild_id = %s AND user_id = %s",
-                    (guild_id, user_id)
-                )
+                # Runs of the same kind go out together; order between sets and removes is kept
+                for kind, ops in itertools.groupby(batch, key=lambda op: op[0]):
+                    rows = [op[1:] for op in ops]
+                    if kind == "set":
+                        await cur.executemany(
+                            """
+                            INSERT INTO afk_status (guild_id, user_id, reason)
+                            VALUES (%s, %s, %s)
+                            ON DUPLICATE KEY UPDATE reason = VALUES(reason), since = CURRENT_TIMESTAMP
+                            """,
+                            rows
+                        )
+                    else:
+                        await cur.executemany(
+                            "DELETE FROM afk_status WHERE guild_id = %s AND user_id = %s",
+                            rows
+                        )
 
+    def _clear_afk(self, guild_id: int, user_id: int):
+        guild_afk = self.afk.get(guild_id)
+        if guild_afk is not None:
+            guild_afk.pop(user_id, None)
+            if not guild_afk:
+                del self.afk[guild_id]
+        self._remove_afk_db(guild_id, user_id)
+
+
+    async def _load_code_stats(self):
+        loop = asyncio.get_event_loop()
+
+        def _scan():
+            total_lines = 0
+            total_files = 0
+            total_imports = 0
+
+            # Walk through both src and cogs directories
+            for directory in ('src', 'cogs'):
+                if not os.path.exists(directory):
+                    continue
+
+                for root, dirs, files in os.walk(directory):
+                    for file in files:
+                        if file.endswith('.py'):
+                            total_files += 1
+                            try:
+                                with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
+                                    for line in f:
+                                        total_lines += 1
+                                        if line.strip().startswith(('import ', 'from ')):
+                                            total_imports += 1
+                            except Exception:
+                                pass
+            return total_lines, total_files, total_imports
+
+        self.code_stats = await loop.run_in_executor(None, _scan)
+
+    def _count_totals(self):
+        self.total_users = sum(g.member_count or 0 for g in self.bot.guilds)
+        self.total_channels = sum(len(g.channels) for g in self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Full recount on every (re)connect; events keep it current in between
+        self._count_totals()
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.total_users += guild.member_count or 0
+        self.total_channels += len(guild.channels)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.total_users -= guild.member_count or 0
+        self.total_channels -= len(guild.channels)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.total_users += 1
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.total_users -= 1
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.total_channels += 1
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.total_channels -= 1
 
     @commands.Cog.listener()
     async def on_message_delete(self, message):
         """Track deleted messages for snipe command"""
         if message.author.bot:
             return
-        
-        # Store message with deletion timestamp
-        if message.channel.id not in self.snipe_cache:
-            self.snipe_cache[message.channel.id] = []
-        
-        # Keep only last 10 messages per channel
-        if len(self.snipe_cache[message.channel.id]) >= 10:
-            self.snipe_cache[message.channel.id].pop(0)
-        
-        self.snipe_cache[message.channel.id].append((message, discord.utils.utcnow()))
+
+        self.snipe_cache.add(message.channel.id, SnipedMessage(message))
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, before, after):
+        """Track previous message content for editsnipe command"""
+        if before.author.bot or before.content == after.content:
+            return
+
+        self.editsnipe_cache.add(before.channel.id, SnipedMessage(before))
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Clear AFK when a user speaks and notify about mentioned AFK users."""
         if message.author.bot or not message.guild:
             return
-        
-        # Ignore if this is a command invocation (don't remove AFK when setting it)
-        ctx = await self.bot.get_context(message)
-        if ctx.valid and ctx.command:
+
+        # Fast path: most guilds have nobody AFK, and most messages don't involve anyone who is
+        guild_afk = self.afk.get(message.guild.id)
+        if not guild_afk:
+            return
+        author_afk = message.author.id in guild_afk
+        mentioned = [m for m in message.mentions if m.id in guild_afk and m.id != message.author.id]
+        if not author_afk and not mentioned:
             return
 
         gid = message.guild.id
         # If the author was AFK, remove status and send embed
-        if gid in self.afk and message.author.id in self.afk[gid]:
+        if author_afk:
+            # Ignore if this is a command invocation (don't remove AFK when setting it)
+            ctx = await self.bot.get_context(message)
+            if ctx.valid and ctx.command:
+                return
+
             try:
-                reason, since_ts = self.afk[gid].get(message.author.id, ("", int(datetime.utcnow().timestamp())))
-                # remove from cache then DB
-                try:
-                    del self.afk[gid][message.author.id]
-                except KeyError:
-                    pass
-                await self._remove_afk_db(gid, message.author.id)
+                reason, since_ts = guild_afk.get(message.author.id, ("", int(datetime.utcnow().timestamp())))
+                # remove from cache, DB write is queued
+                self._clear_afk(gid, message.author.id)
 
                 since_field = f"<t:{since_ts}:R>" if since_ts else "Unknown"
                 embed = discord.Embed(
@@ -168,9 +342,9 @@ class Utility(commands.Cog):
 
         # Notify if any mentioned users are AFK (send a single embed summarizing)
         mentioned_afk = []
-        for m in message.mentions:
-            if gid in self.afk and m.id in self.afk[gid]:
-                reason, since_ts = self.afk[gid][m.id]
+        for m in mentioned:
+            if m.id in guild_afk:
+                reason, since_ts = guild_afk[m.id]
                 time_str = f"<t:{since_ts}:R>" if since_ts else "Unknown"
                 mentioned_afk.append((m, reason or "No reason provided", time_str))
 
@@ -540,9 +714,8 @@ class Utility(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.command(name='dominantcolor', aliases=['dc', 'domcolor'], extras={'example': 'dominantcolor [attach image]'})
-    async def dominantcolor(self, ctx, url: Optional[str] = None):
-        """Get the dominant color of an image"""
+    async def _image_palette(self, ctx, url: Optional[str], colors: int):
+        """Resolve the image for a command and return (image_url, palette), or (None, None) after replying"""
         image_url = None
         
         # Check for attachments first
@@ -555,10 +728,15 @@ class Utility(commands.Cog):
                 description=f"{Config.EMOJIS.ERROR} Please provide an image URL or attach an image",
                 color=Config.COLORS.ERROR
             )
-            return await ctx.send(embed=embed)
-        
+            await ctx.send(embed=embed)
+            return None, None
+
+        palette = self.images.cached(image_url, colors)
+        if palette is not None:
+            return image_url, palette
+
         try:
-            # Download the image
+            # Download the image, refusing anything over the size limit
             async with aiohttp.ClientSession() as session:
                 async with session.get(image_url) as resp:
                     if resp.status != 200:
@@ -566,50 +744,19 @@ class Utility(commands.Cog):
                             description=f"{Config.EMOJIS.ERROR} Could not download the image",
                             color=Config.COLORS.ERROR
                         )
-                        return await ctx.send(embed=embed)
-                    
-                    image_data = await resp.read()
-            
-            # Open image with PIL
-            image = Image.open(BytesIO(image_data))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize for faster processing
-            image = image.resize((150, 150))
-            
-            # Get all pixels
-            pixels = list(image.getdata())
-            
-            # Count color occurrences
-            color_counter = Counter(pixels)
-            
-            # Get the most common color
-            dominant_color = color_counter.most_common(1)[0][0]
-            
-            # Convert to hex
-            hex_color = '#{:02x}{:02x}{:02x}'.format(dominant_color[0], dominant_color[1], dominant_color[2])
-            
-            # Convert hex to int for Discord color
-            color_int = int(hex_color[1:], 16)
-            
-            # Create embed
-            embed = discord.Embed(
-                title="Dominant Color",
-                color=color_int
-            )
-            
-            embed.add_field(
-                name="Color Info",
-                value=f"**Hex:** `{hex_color.upper()}`\n**RGB:** `{dominant_color[0]}, {dominant_color[1]}, {dominant_color[2]}`",
-                inline=False
-            )
-            
-            embed.set_thumbnail(url=image_url)
-            
-            await ctx.send(embed=embed)
+                        await ctx.send(embed=embed)
+                        return None, None
+                    if (resp.content_length or 0) > MAX_BYTES:
+                        raise ImageTooLarge(f"Image is over {MAX_BYTES // (1024 * 1024)}MB")
+
+                    image_data = bytearray()
+                    async for chunk in resp.content.iter_chunked(65536):
+                        image_data.extend(chunk)
+                        if len(image_data) > MAX_BYTES:
+                            raise ImageTooLarge(f"Image is over {MAX_BYTES // (1024 * 1024)}MB")
+
+            # Decoding and quantizing happen in a worker process
+            return image_url, await self.images.palette(bytes(image_data), colors, url=image_url)
             
         except Exception as e:
             embed = discord.Embed(
@@ -617,6 +764,56 @@ class Utility(commands.Cog):
                 color=Config.COLORS.ERROR
             )
             await ctx.send(embed=embed)
+            return None, None
+
+    @commands.command(name='dominantcolor', aliases=['dc', 'domcolor'], extras={'example': 'dominantcolor [attach image]'})
+    async def dominantcolor(self, ctx, url: Optional[str] = None):
+        """Get the dominant color of an image"""
+        image_url, palette = await self._image_palette(ctx, url, 5)
+        if not palette:
+            return
+        
+        dominant_color = palette[0][0]
+        
+        # Convert to hex
+        hex_color = '#{:02x}{:02x}{:02x}'.format(dominant_color[0], dominant_color[1], dominant_color[2])
+        
+        # Create embed
+        embed = discord.Embed(
+            title="Dominant Color",
+            color=int(hex_color[1:], 16)
+        )
+        
+        embed.add_field(
+            name="Color Info",
+            value=f"**Hex:** `{hex_color.upper()}`\n**RGB:** `{dominant_color[0]}, {dominant_color[1]}, {dominant_color[2]}`",
+            inline=False
+        )
+        
+        embed.set_thumbnail(url=image_url)
+        
+        await ctx.send(embed=embed)
+
+    @commands.command(name='palette', aliases=['colors'], extras={'example': 'palette 6 [attach image]'})
+    async def palette(self, ctx, colors: Optional[int] = 5, url: Optional[str] = None):
+        """Get the main colors of an image"""
+        colors = max(2, min(colors or 5, 10))
+        image_url, palette = await self._image_palette(ctx, url, colors)
+        if not palette:
+            return
+
+        lines = []
+        for (r, g, b), share in palette:
+            lines.append(f"`#{r:02X}{g:02X}{b:02X}` — `{r}, {g}, {b}` — {share:.0%}")
+
+        r, g, b = palette[0][0]
+        embed = discord.Embed(
+            title="Color Palette",
+            description="\n".join(lines),
+            color=(r << 16) | (g << 8) | b
+        )
+        embed.set_thumbnail(url=image_url)
+        await ctx.send(embed=embed)
 
     @commands.command(name='botinfo', aliases=['bi', 'about'], extras={'example': 'botinfo'})
     async def botinfo(self, ctx):
@@ -627,39 +824,13 @@ class Utility(commands.Cog):
         os_name = platform.system()
         ram_gb = round(psutil.virtual_memory().total / (1024 ** 3))
         
-        # Count bot stats
-        total_lines = 0
-        total_files = 0
-        total_imports = 0
-        
-        # Walk through both src and cogs directories
-        directories_to_scan = ['src', 'cogs']
-        
-        for directory in directories_to_scan:
-            # Check if directory exists before scanning
-            if not os.path.exists(directory):
-                continue
-                
-            for root, dirs, files in os.walk(directory):
-                for file in files:
-                    if file.endswith('.py'):
-                        total_files += 1
-                        file_path = os.path.join(root, file)
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                lines = f.readlines()
-                                total_lines += len(lines)
-                                # Count imports
-                                for line in lines:
-                                    if line.strip().startswith(('import ', 'from ')):
-                                        total_imports += 1
-                        except Exception:
-                            pass
+        # Code stats are scanned when the cog loads
+        total_lines, total_files, total_imports = self.code_stats or (0, 0, 0)
         
         # Get bot stats
-        total_users = sum(g.member_count for g in bot.guilds)
+        total_users = self.total_users
         total_servers = len(bot.guilds)
-        total_channels = sum(len(g.channels) for g in bot.guilds)
+        total_channels = self.total_channels
         
         # Count commands and cogs
         total_commands = len([cmd for cmd in bot.walk_commands()])
@@ -710,24 +881,20 @@ class Utility(commands.Cog):
         view = PaginatorView(embeds=embeds)
         
         await ctx.send(embed=embeds[0], view=view)
-    @commands.command(name='snipe', aliases=['s'], extras={'example': 'snipe'})
-    async def snipe(self, ctx):
-        """View recently deleted messages in this channel"""
-        if ctx.channel.id not in self.snipe_cache or not self.snipe_cache[ctx.channel.id]:
+    async def _send_snipes(self, ctx, records: list, action: str):
+        """Send records newest first, paginated when there is more than one"""
+        if not records:
             embed = discord.Embed(
-                description=f"{Config.EMOJIS.ERROR} No deleted messages found in this channel",
+                description=f"{Config.EMOJIS.ERROR} No {action.lower()} messages found in this channel",
                 color=Config.COLORS.ERROR
             )
             return await ctx.send(embed=embed)
-        
-        # Get all sniped messages for this channel
-        sniped_messages = self.snipe_cache[ctx.channel.id]
-        
+
         # Create embeds for each sniped message
         embeds = []
-        for idx, (message, deleted_at) in enumerate(reversed(sniped_messages), 1):
+        for idx, record in enumerate(reversed(records), 1):
             # Calculate time ago
-            time_diff = discord.utils.utcnow() - deleted_at
+            time_diff = discord.utils.utcnow() - record.at
             
             # Format time ago
             if time_diff.total_seconds() < 60:
@@ -741,22 +908,24 @@ class Utility(commands.Cog):
             
             # Create embed
             embed = discord.Embed(
-                description=message.content if message.content else "*No content*",
+                description=record.content if record.content else "*No content*",
                 color=Config.COLORS.DEFAULT
             )
             
-            # Set author
-            embed.set_author(
-                name=message.author.name,
-                icon_url=message.author.display_avatar.url
-            )
+            # Set author, looked up now since only the id is kept
+            author = ctx.guild.get_member(record.author_id) if ctx.guild else None
+            author = author or self.bot.get_user(record.author_id)
+            if author:
+                embed.set_author(name=author.name, icon_url=author.display_avatar.url)
+            else:
+                embed.set_author(name=f"Unknown user ({record.author_id})")
             
             # Add image if message had attachments
-            if message.attachments:
-                embed.set_image(url=message.attachments[0].url)
+            if record.attachments:
+                embed.set_image(url=record.attachments[0])
             
             # Set footer
-            embed.set_footer(text=f"Snipe {idx}/{len(sniped_messages)} • Deleted: {time_ago}")
+            embed.set_footer(text=f"Snipe {idx}/{len(records)} • {action}: {time_ago}")
             
             embeds.append(embed)
         
@@ -764,30 +933,32 @@ class Utility(commands.Cog):
         if len(embeds) == 1:
             await ctx.send(embed=embeds[0])
         else:
-            # Import paginator
-            from src.tools.paginator import PaginatorView
-            
-            # Send with paginator
             view = PaginatorView(embeds)
             await ctx.send(embed=embeds[0], view=view)
+
+    @commands.command(name='snipe', aliases=['s'], extras={'example': 'snipe'})
+    async def snipe(self, ctx):
+        """View recently deleted messages in this channel"""
+        await self._send_snipes(ctx, self.snipe_cache.get(ctx.channel.id), "Deleted")
+
+    @commands.command(name='editsnipe', aliases=['es'], extras={'example': 'editsnipe'})
+    async def editsnipe(self, ctx):
+        """View what recently edited messages in this channel said before the edit"""
+        await self._send_snipes(ctx, self.editsnipe_cache.get(ctx.channel.id), "Edited")
     
     @commands.command(name='clearsnipe', aliases=['cs'], extras={'example': 'clearsnipe'})
     @commands.has_permissions(manage_messages=True)
     async def clearsnipe(self, ctx):
         """Clear all sniped messages in this channel"""
-        if ctx.channel.id not in self.snipe_cache or not self.snipe_cache[ctx.channel.id]:
+        # Clear both snipe caches for this channel
+        count = self.snipe_cache.clear(ctx.channel.id) + self.editsnipe_cache.clear(ctx.channel.id)
+        if not count:
             embed = discord.Embed(
                 description=f"{Config.EMOJIS.ERROR} No sniped messages to clear in this channel",
                 color=Config.COLORS.ERROR
             )
             return await ctx.send(embed=embed)
         
-        # Get count before clearing
-        count = len(self.snipe_cache[ctx.channel.id])
-        
-        # Clear the snipe cache for this channel
-        self.snipe_cache[ctx.channel.id] = []
-        
         embed = discord.Embed(
             description=f"{Config.EMOJIS.SUCCESS} Cleared **{count}** sniped message{'s' if count != 1 else ''} from this channel",
             color=Config.COLORS.SUCCESS
@@ -806,11 +977,7 @@ class Utility(commands.Cog):
         # Remove AFK if user passed off/clear/remove
         if reason and reason.lower() in ("off", "remove", "clear"):
             if gid in self.afk and uid in self.afk[gid]:
-                try:
-                    del self.afk[gid][uid]
-                except KeyError:
-                    pass
-                await self._remove_afk_db(gid, uid)
+                self._clear_afk(gid, uid)
                 return await ctx.approve("AFK removed")
             return await ctx.warn("You are not AFK")
 
@@ -820,7 +987,7 @@ class Utility(commands.Cog):
         if gid not in self.afk:
             self.afk[gid] = {}
         self.afk[gid][uid] = (reason_text, ts)
-        await self._set_afk_db(gid, uid, reason_text)
+        self._set_afk_db(gid, uid, reason_text)
         await ctx.approve(f"I set you AFK with the message **{reason_text}**")
 
     @commands.command(name='poll', extras={'example': 'poll "Do you like pizza?" "Yes" "No" "Maybe"'})
@@ -60,8 +60,13 @@ class SlitBot(commands.Bot):
         return commands.when_mentioned_or(*prefixes)(self, message)
 
     async def get_context(self, message, *, cls=None):
-        """Override to use CustomContext"""
-        return await super().get_context(message, cls=cls or CustomContext)
+        """Override to use CustomContext and resolve per-guild aliases and macros"""
+        ctx = await super().get_context(message, cls=cls or CustomContext)
+        if ctx.command is None and ctx.invoked_with and message.guild:
+            alias_cog = self.get_cog("Alias")
+            if alias_cog:
+                alias_cog.resolve_context(ctx)
+        return ctx
 
     async def setup_hook(self):
         """Setup hook for bot initialization"""
@@ -0,0 +1,57 @@
+from collections import deque
+from typing import Iterable, Iterator, Tuple
+
+
+class Automaton:
+    """Aho-Corasick automaton that finds every literal pattern in a single pass over the text"""
+
+    __slots__ = ("patterns", "goto", "fail", "out")
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self.goto = [{}]  # node -> {char: node}
+        out = [[]]  # node -> pattern indexes ending here
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(index)
+
+        # Breadth-first so every failure target is finished before it is used
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self.goto[node].items():
+                queue.append(nxt)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                out[nxt].extend(out[self.fail[nxt]])
+
+        self.out = [tuple(indexes) for indexes in out]
+
+    def __bool__(self) -> bool:
+        return len(self.goto) > 1
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end_index, pattern_index) for every occurrence, in order of where they end"""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                yield position, index
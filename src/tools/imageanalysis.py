@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+MAX_BYTES = 8 * 1024 * 1024  # downloads above this are refused
+MAX_PIXELS = 40_000_000  # declared image size above this is refused before decoding
+SAMPLE_SIZE = 256  # images are shrunk to fit this box before quantizing
+
+Palette = List[Tuple[Tuple[int, int, int], float]]
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image is over the byte or pixel limits"""
+
+
+def extract_palette(data: bytes, colors: int) -> Palette:
+    """Quantize an image to `colors` colors and return [(rgb, share)] from most to least common
+
+    Runs in a worker process. Pillow's median cut works on the whole bitmap in C,
+    so no per-pixel Python objects are built.
+    """
+    image = Image.open(BytesIO(data))
+    width, height = image.size
+    if width * height > MAX_PIXELS:
+        raise ImageTooLarge(f"Image is {width}x{height}, the limit is {MAX_PIXELS:,} pixels")
+
+    # JPEGs can decode straight at a reduced scale; everything else is shrunk after decoding
+    image.draft("RGB", (SAMPLE_SIZE, SAMPLE_SIZE))
+    image = image.convert("RGB")
+    image.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+
+    quantized = image.quantize(colors=colors, method=getattr(Image, "Quantize", Image).MEDIANCUT)
+    palette = quantized.getpalette()
+    counts = sorted(quantized.getcolors(colors) or [], reverse=True)
+    total = sum(count for count, _ in counts) or 1
+    return [(tuple(palette[index * 3:index * 3 + 3]), count / total) for count, index in counts]
+
+
+class ImageAnalyzer:
+    """Palette extraction on a process pool, cached by image URL and by content hash"""
+
+    def __init__(self, workers: int = 2, cache_size: int = 512):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.pool = None
+        self.results = OrderedDict()  # (sha1, colors) -> Palette
+        self.urls = OrderedDict()  # url -> sha1
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Started on first use; spawn keeps the bot's threads and sockets out of the workers
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    def _remember(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def cached(self, url: str, colors: int) -> Optional[Palette]:
+        """A palette for an image URL seen before, without downloading it again"""
+        digest = self.urls.get(url)
+        if digest is None:
+            return None
+        palette = self.results.get((digest, colors))
+        if palette is not None:
+            self.results.move_to_end((digest, colors))
+        return palette
+
+    async def palette(self, data: bytes, colors: int = 5, url: Optional[str] = None) -> Palette:
+        if len(data) > MAX_BYTES:
+            raise ImageTooLarge(f"Image is over {MAX_BYTES // (1024 * 1024)}MB")
+
+        digest = hashlib.sha1(data).hexdigest()
+        if url:
+            self._remember(self.urls, url, digest)
+        palette = self.results.get((digest, colors))
+        if palette is None:
+            loop = asyncio.get_event_loop()
+            palette = await loop.run_in_executor(self._executor(), extract_palette, data, colors)
+        self._remember(self.results, (digest, colors), palette)
+        return palette
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
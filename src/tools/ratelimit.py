@@ -0,0 +1,40 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+
+
+class TokenBuckets:
+    """Token buckets keyed by anything hashable, capped at max_keys with LRU eviction
+
+    An evicted bucket simply starts full again the next time its key is seen,
+    so the cap bounds memory without ever blocking anyone wrongly.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def _tokens(self, key: Hashable, rate: int, per: float, now: float) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return float(rate)
+        tokens, updated_at = bucket
+        return min(float(rate), tokens + (now - updated_at) * rate / per)
+
+    def acquire(self, limits: Iterable[Tuple[Hashable, int, float]]) -> Optional[Hashable]:
+        """Take one token from every (key, rate, per) bucket, or from none of them
+
+        Returns None when allowed, otherwise the key of the first empty bucket.
+        """
+        now = time.monotonic()
+        limits = list(limits)
+        levels = [self._tokens(key, rate, per, now) for key, rate, per in limits]
+
+        blocked = next((key for (key, _, _), tokens in zip(limits, levels) if tokens < 1), None)
+        for (key, _, _), tokens in zip(limits, levels):
+            self.buckets[key] = (tokens if blocked is not None else tokens - 1, now)
+            self.buckets.move_to_end(key)
+
+        while len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return blocked
@@ -0,0 +1,168 @@
+import discord
+from typing import Optional
+from src.config import Config
+
+
+class TemplateError(ValueError):
+    """Raised when a response template can't be compiled"""
+
+
+VARIABLES = {
+    "user": lambda m: m.author.mention,
+    "author": lambda m: m.author.mention,
+    "user.mention": lambda m: m.author.mention,
+    "user.name": lambda m: m.author.name,
+    "user.display_name": lambda m: m.author.display_name,
+    "user.id": lambda m: str(m.author.id),
+    "user.avatar": lambda m: m.author.display_avatar.url,
+    "guild": lambda m: m.guild.name,
+    "guild.name": lambda m: m.guild.name,
+    "guild.id": lambda m: str(m.guild.id),
+    "guild.icon": lambda m: m.guild.icon.url if m.guild.icon else "",
+    "member_count": lambda m: str(m.guild.member_count or 0),
+    "channel": lambda m: m.channel.mention,
+    "channel.name": lambda m: m.channel.name,
+    "channel.id": lambda m: str(m.channel.id),
+    "mentions": lambda m: ", ".join(u.mention for u in m.mentions),
+    "mention_count": lambda m: str(len(m.mentions)),
+}
+
+EMBED_FIELDS = ("title", "description", "color", "footer", "image", "thumbnail", "author", "url")
+
+
+def _split_tags(text: str):
+    """Yield literal strings and the inner text of balanced {...} tags"""
+    i, literal_start = 0, 0
+    while i < len(text):
+        if text[i] != "{":
+            i += 1
+            continue
+        depth, j = 1, i + 1
+        while j < len(text) and depth:
+            depth += {"{": 1, "}": -1}.get(text[j], 0)
+            j += 1
+        if depth:
+            raise TemplateError("Unclosed `{`")
+        if i > literal_start:
+            yield text[literal_start:i]
+        yield ("tag", text[i + 1:j - 1])
+        i = literal_start = j
+    if literal_start < len(text):
+        yield text[literal_start:]
+
+
+def _parse(text: str, variables: set, embed: Optional[dict]):
+    """Compile text into nodes: str, ("var", name) or ("if", name, then_nodes, else_nodes)"""
+    root = []
+    stack = [(root, None)]  # (node list being filled, open "if" node)
+    for part in _split_tags(text):
+        nodes = stack[-1][0]
+        if isinstance(part, str):
+            nodes.append(part)
+            continue
+
+        tag = part[1].strip()
+        name, _, value = tag.partition(":")
+        name = name.strip().lower()
+        if value and name in EMBED_FIELDS:
+            if embed is None:
+                raise TemplateError(f"`{{{name}: ...}}` can't be nested")
+            if name in embed:
+                raise TemplateError(f"`{name}` is set twice")
+            embed[name] = _parse(value.strip(), variables, None)
+        elif tag.lower().startswith("if "):
+            condition = tag[3:].strip().lower()
+            if condition not in VARIABLES:
+                raise TemplateError(f"Unknown variable `{condition}` in `{{if}}`")
+            variables.add(condition)
+            node = ("if", condition, [], [])
+            nodes.append(node)
+            stack.append((node[2], node))
+        elif tag.lower() == "else":
+            if stack[-1][1] is None or nodes is not stack[-1][1][2]:
+                raise TemplateError("`{else}` without `{if}`")
+            stack[-1] = (stack[-1][1][3], stack[-1][1])
+        elif tag.lower() == "end":
+            if stack[-1][1] is None:
+                raise TemplateError("`{end}` without `{if}`")
+            stack.pop()
+        elif tag.lower() in VARIABLES:
+            variables.add(tag.lower())
+            nodes.append(("var", tag.lower()))
+        else:
+            raise TemplateError(f"Unknown variable `{{{tag}}}`")
+
+    if len(stack) > 1:
+        raise TemplateError("`{if}` without `{end}`")
+    return root
+
+
+def _render(nodes: list, values: dict) -> str:
+    out = []
+    for node in nodes:
+        if isinstance(node, str):
+            out.append(node)
+        elif node[0] == "var":
+            out.append(values[node[1]])
+        else:
+            _, condition, then, other = node
+            out.append(_render(then if values[condition] not in ("", "0") else other, values))
+    return "".join(out)
+
+
+class Template:
+    """A response compiled once into literal segments, variables, conditionals and embed fields"""
+
+    __slots__ = ("content", "embed", "color", "variables")
+
+    def __init__(self, source: str):
+        self.variables = set()
+        embed = {}
+        self.content = _parse(source, self.variables, embed)
+
+        self.color = None
+        color = embed.pop("color", None)
+        if color is not None:
+            if len(color) != 1 or not isinstance(color[0], str):
+                raise TemplateError("`color` must be a hex code like `#a6aa5c`")
+            try:
+                self.color = int(color[0].strip().lstrip("#"), 16)
+            except ValueError:
+                raise TemplateError("`color` must be a hex code like `#a6aa5c`")
+        self.embed = embed
+        if self.color is not None and not self.embed:
+            raise TemplateError("`color` needs an embed field such as `title` or `description`")
+
+        if not self.embed and not "".join(n for n in self.content if isinstance(n, str)).strip() and not self.variables:
+            raise TemplateError("Response is empty")
+
+    @classmethod
+    def literal(cls, text: str) -> "Template":
+        """A template that sends text as-is, for stored responses that don't compile"""
+        template = cls.__new__(cls)
+        template.content, template.embed, template.color, template.variables = [text], {}, None, set()
+        return template
+
+    def render(self, message: discord.Message) -> dict:
+        """Return send() kwargs for a message that triggered this template"""
+        values = {name: VARIABLES[name](message) for name in self.variables}
+        content = _render(self.content, values).strip()[:2000] or None
+        if not self.embed:
+            return {"content": content}
+
+        fields = {name: _render(nodes, values) for name, nodes in self.embed.items()}
+        embed = discord.Embed(
+            title=fields.get("title") or None,
+            description=fields.get("description") or None,
+            url=fields.get("url") or None,
+            color=self.color if self.color is not None else Config.COLORS.DEFAULT,
+        )
+        if fields.get("footer"):
+            embed.set_footer(text=fields["footer"])
+        if fields.get("author"):
+            embed.set_author(name=fields["author"])
+        if fields.get("image"):
+            embed.set_image(url=fields["image"])
+        if fields.get("thumbnail"):
+            embed.set_thumbnail(url=fields["thumbnail"])
+        return {"content": content, "embed": embed}
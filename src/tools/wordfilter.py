@@ -0,0 +1,269 @@
+import re
+import random
+import string
+import time
+from typing import Hashable, Iterable, Optional, Tuple
+
+from src.tools.ahocorasick import Automaton
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+MAX_PATTERN_LENGTH = 260  # same limit AutoMod puts on regex_patterns
+MIN_LITERAL_LENGTH = 3
+MAX_SCAN_LENGTH = 2000  # regexes only look at this much of a message
+MAX_REPEAT_COST = 5000  # product of every quantifier's range, with open-ended ones counted as MAX_SCAN_LENGTH
+
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+_REPEATS = tuple(getattr(sre_constants, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(sre_constants, name))
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def parse_keyword(keyword: str) -> Tuple[str, bool, bool]:
+    """Split an AutoMod style keyword into (literal, needs_left_boundary, needs_right_boundary)
+
+    `word` matches whole words, `word*` word prefixes, `*word` suffixes and `*word*` anywhere.
+    """
+    return keyword.strip("*"), not keyword.startswith("*"), not keyword.endswith("*")
+
+
+def _backtracking_risk(items, repeated: bool = False) -> Tuple[Optional[str], int]:
+    """Return (problem, cost) for a parsed pattern
+
+    Python's engine backtracks, so a quantifier inside another one, an alternation
+    under a quantifier, or two quantifiers that can trade characters can take
+    exponential or polynomial time on a message that almost matches. Nesting is
+    refused outright; side by side quantifiers are allowed while the product of
+    their ranges (the retries at each position) stays under MAX_REPEAT_COST.
+    """
+    cost = 1
+    for op, value in items:
+        children = ()
+        if op in _REPEATS:
+            low, high, children = value
+            if high > 1 and repeated:
+                return "Quantifiers can't be nested, e.g. `(a+)+`", cost
+            span = MAX_SCAN_LENGTH if high is sre_constants.MAXREPEAT else max(0, min(high, MAX_SCAN_LENGTH) - low)
+            cost *= span + 1
+            problem, inner = _backtracking_risk(children, repeated or high > 1)
+            if problem:
+                return problem, cost
+            cost *= inner
+            continue
+        elif op is sre_constants.SUBPATTERN:
+            children = [value[-1]]
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            children = [value]
+        elif op is sre_constants.BRANCH:
+            if repeated:
+                return "Alternations can't be repeated, e.g. `(a|ab)+`", cost
+            # Only one side of an alternation is tried at a time, so their costs add up
+            total = 0
+            for branch in value[1]:
+                problem, inner = _backtracking_risk(branch, repeated)
+                if problem:
+                    return problem, cost
+                total += inner
+            cost *= total
+            continue
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            children = [value[1]]
+        elif op is sre_constants.GROUPREF_EXISTS:
+            children = [branch for branch in value[1:] if branch is not None]
+
+        for child in children:
+            problem, inner = _backtracking_risk(child, repeated)
+            if problem:
+                return problem, cost
+            cost *= inner
+    return None, cost
+
+
+def validate_regex(pattern: str) -> Optional[str]:
+    """Return why a pattern can't be used, or None if it can"""
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return f"Patterns are limited to {MAX_PATTERN_LENGTH} characters"
+    if _BACKREFERENCE.search(pattern):
+        return "Backreferences aren't supported"
+    try:
+        re.compile(pattern)
+        parsed = sre_parse.parse(pattern)
+    except re.error as e:
+        return f"Invalid regex: {e}"
+
+    problem, cost = _backtracking_risk(parsed)
+    if problem:
+        return problem
+    if cost > MAX_REPEAT_COST:
+        return "Too much backtracking possible; use one `*`/`+` at most and keep other quantifiers small, like `{1,20}`"
+    return None
+
+
+def _scoped(pattern: str) -> str:
+    """Turn leading global flags like `(?i)` into a group so patterns can be joined"""
+    match = _GLOBAL_FLAGS.match(pattern)
+    if match:
+        return f"(?{match.group(1)}:{pattern[match.end():]})"
+    return f"(?:{pattern})"
+
+
+def _required_literal(pattern: str) -> str:
+    """The longest literal run every match of pattern must contain, lowercased, or ""
+
+    Only runs at the top level (and inside plain groups) count, so anything under
+    an alternation or a repeat is ignored and the answer is always safe to rely on.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return ""
+
+    best, run = "", []
+
+    def walk(items):
+        nonlocal best, run
+        for op, value in items:
+            if op is sre_constants.LITERAL:
+                run.append(chr(value))
+                continue
+            if op is sre_constants.SUBPATTERN:
+                walk(value[-1])
+                continue
+            if op is not sre_constants.AT:  # anchors and \b take no characters
+                if len(run) > len(best):
+                    best = "".join(run)
+                run = []
+        if len(run) > len(best):
+            best = "".join(run)
+
+    walk(parsed)
+    return best.lower() if len(best) >= MIN_LITERAL_LENGTH else ""
+
+
+class FilterMatcher:
+    """A guild's keywords and regexes compiled once into a single automaton pass
+
+    Keywords are matched by the automaton directly. Each regex contributes the
+    literal it can't match without, so it only runs when that literal shows up;
+    regexes with no usable literal are joined into one alternation that always runs.
+    """
+
+    __slots__ = ("automaton", "keyword_labels", "bounds", "gated", "regex", "regex_labels", "fallback")
+
+    def __init__(self, keywords: Iterable[Tuple[Hashable, str]], patterns: Iterable[Tuple[Hashable, str]]):
+        self.keyword_labels = []
+        self.bounds = []
+        literals = []
+        for label, keyword in keywords:
+            literal, left, right = parse_keyword(keyword.lower())
+            if not literal:
+                continue
+            literals.append(literal)
+            self.keyword_labels.append(label)
+            self.bounds.append((left, right))
+
+        self.gated = []  # (label, compiled) for regexes found through their literal
+        ungated = []
+        for label, pattern in patterns:
+            literal = _required_literal(pattern)
+            if literal:
+                literals.append(literal)
+                self.gated.append((label, re.compile(pattern, re.IGNORECASE)))
+            else:
+                ungated.append((label, pattern))
+        self.automaton = Automaton(literals)
+
+        self.regex = None
+        self.regex_labels = [label for label, _ in ungated]
+        self.fallback = []
+        if ungated:
+            alternatives = [f"(?P<_rule{i}>{_scoped(pattern)})" for i, (_, pattern) in enumerate(ungated)]
+            try:
+                self.regex = re.compile("|".join(alternatives), re.IGNORECASE)
+            except re.error:
+                # A pattern that only breaks when joined (e.g. clashing group names) is checked on its own
+                self.fallback = [(label, re.compile(pattern, re.IGNORECASE)) for label, pattern in ungated]
+
+    def __bool__(self) -> bool:
+        return bool(self.automaton) or bool(self.regex_labels)
+
+    def match(self, content: str) -> Optional[Tuple[Hashable, str]]:
+        """Return (label, matched_text) for the first rule the message breaks, or None
+
+        Keywords are checked across the whole message, regexes only across the first MAX_SCAN_LENGTH characters.
+        """
+        candidates = set()
+        if self.automaton:
+            text = content.lower()
+            keyword_count = len(self.keyword_labels)
+            for end, index in self.automaton.iter(text):
+                if index >= keyword_count:
+                    candidates.add(index - keyword_count)
+                    continue
+                start = end - len(self.automaton.patterns[index]) + 1
+                left, right = self.bounds[index]
+                if left and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if right and end < len(text) - 1 and _is_word_char(text[end + 1]):
+                    continue
+                return self.keyword_labels[index], text[start:end + 1]
+
+        content = content[:MAX_SCAN_LENGTH]
+        for index in sorted(candidates):
+            label, regex = self.gated[index]
+            match = regex.search(content)
+            if match:
+                return label, match.group()
+        if self.regex is not None:
+            match = self.regex.search(content)
+            if match:
+                return self.regex_labels[int(match.lastgroup[5:])], match.group()
+        for label, regex in self.fallback:
+            match = regex.search(content)
+            if match:
+                return label, match.group()
+        return None
+
+
+def benchmark(rules: int = 1000, messages: int = 20000, regex_share: float = 0.05, seed: int = 0) -> float:
+    """Messages per second on one core against a matcher with `rules` keywords and regexes"""
+    rng = random.Random(seed)
+
+    def word(low=3, high=9):
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+    keywords, patterns = [], []
+    for i in range(rules):
+        if rng.random() < regex_share:
+            patterns.append((("regex", i), rf"\b{word()}\d+{word(2, 4)}\b"))
+        else:
+            keyword = word()
+            keywords.append((("keyword", i), rng.choice(["{}", "*{}", "{}*", "*{}*"]).format(keyword)))
+
+    started = time.perf_counter()
+    matcher = FilterMatcher(keywords, patterns)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    corpus = [" ".join(word(2, 8) for _ in range(rng.randint(3, 25))) for _ in range(1000)]
+    started = time.perf_counter()
+    hits = 0
+    for i in range(messages):
+        if matcher.match(corpus[i % len(corpus)]) is not None:
+            hits += 1
+    elapsed = time.perf_counter() - started
+
+    rate = messages / elapsed
+    print(f"{len(keywords)} keywords + {len(patterns)} regexes compiled in {compile_ms:.1f}ms")
+    print(f"{rate:,.0f} messages/sec ({hits} of {messages} matched)")
+    return rate
+
+
+if __name__ == "__main__":
+    benchmark()